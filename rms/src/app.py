@@ -1,20 +1,213 @@
 # app.py
 import logging
+import os
 import pathlib
+import queue
 import sys
+import threading
+import time
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from tkinter import messagebox, ttk
+from typing import List
 
 HERE = pathlib.Path(__file__).resolve().parent
 if str(HERE) not in sys.path:
     sys.path.insert(0, str(HERE))
 
-from services import RMS
+from services import RMS, airline_label
+from sqlite_storage import SqliteStorage
+from storage import JsonlStorage
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 
+class VirtualList:
+    """
+    Virtual-list mode for a Treeview: only the rows around the viewport exist
+    as items (visible rows + OVERSCAN on each side), fetched from RMS with
+    fetch(offset, limit) -> Page. The tree scrolls natively inside that window;
+    a separate scrollbar maps to the full result and refetches on the way.
+    """
+
+    OVERSCAN = 50
+
+    def __init__(self, parent, tree: ttk.Treeview, values, key):
+        self.tree, self.values, self.key = tree, values, key
+        self.fetch = None
+        self.appends = False  # showing the whole table in id order
+        self.total = 0
+        self.start = 0  # result offset of the first item in the tree
+        self.count = 0  # number of items in the tree
+        self.top = 0  # result offset of the first visible row
+        self._pending = False
+        self._reload_pending = False
+        self.label = ttk.Label(parent, text="")
+        self.label.pack(side="bottom", fill="x")
+        self.sb = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.sb.pack(side="right", fill="y", pady=8)
+        tree.configure(yscrollcommand=self._on_tree_scrolled)
+
+    def _visible(self) -> int:
+        rowheight = int(ttk.Style(self.tree).lookup("Treeview", "rowheight") or 20)
+        shown = (self.tree.winfo_height() - rowheight) // rowheight
+        return max(int(self.tree.cget("height")), shown, 1)
+
+    def show(self, fetch, appends: bool = False):
+        """Point the list at a new query and jump to its first row.
+        appends=True: the query is the whole table in id order, so new rows
+        belong at its end.
+        """
+        self.fetch, self.appends = fetch, appends
+        self.scroll_to(0)
+
+    # single-row updates from RMS change events (no refetch)
+    def upsert(self, key: int, row: dict, inserted: bool):
+        iid = str(key)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self.values(row))
+            if not self.appends:
+                # the edit may move the row within (or out of) a filtered result
+                self._reload_soon()
+            return
+        if not (inserted and self.appends):
+            return  # not part of this (filtered) result
+        self.total += 1
+        if self.start + self.count == self.total - 1:
+            self.tree.insert("", "end", iid=iid, values=self.values(row))
+            self.count += 1
+        self._update_scrollbar(self._visible())
+
+    def remove(self, key: int):
+        iid = str(key)
+        if self.tree.exists(iid):
+            if self.start + self.tree.index(iid) < self.top:
+                self.top -= 1
+            self.tree.delete(iid)
+            self.count -= 1
+            self.total -= 1
+            self._fill_gap()
+        elif self.appends:
+            # id order: a row below the first item's id sat before the window
+            first = self.tree.get_children()[:1]
+            if not first or key < int(first[0]):
+                self.start = max(0, self.start - 1)
+                self.top = max(0, self.top - 1)
+            self.total -= 1
+        else:
+            # a filtered result can't tell where the row sat without refetching
+            self._reload_soon()
+            return
+        self._update_scrollbar(self._visible())
+
+    def _fill_gap(self):
+        # pull the row that slid into the window's end after a delete
+        end = self.start + self.count
+        if self.fetch is None or end >= self.total:
+            return
+        for r in self.fetch(end, 1).rows:
+            iid = str(r[self.key])
+            if not self.tree.exists(iid):
+                self.tree.insert("", "end", iid=iid, values=self.values(r))
+                self.count += 1
+
+    def _reload_soon(self):
+        # coalesce: one refetch per burst of change events
+        if not self._reload_pending:
+            self._reload_pending = True
+            self.tree.after_idle(self._reload_idle)
+
+    def _reload_idle(self):
+        self._reload_pending = False
+        self.reload()
+
+    def grown(self, total: int):
+        """
+        Rows were bulk-added to the table (background load). Refetch only
+        while the window is still short of rows; after that, an id-order
+        list just moves its row count and other views wait for a reload.
+        """
+        if self.count < self._visible() + 2 * self.OVERSCAN:
+            self.reload()
+        elif self.appends:
+            self.total = total
+            self._update_scrollbar(self._visible())
+
+    def reload(self):
+        """Re-fetch the current window (after the data changed)."""
+        if self.fetch is not None:
+            self.scroll_to(self.top)
+
+    def scroll_to(self, top: int):
+        if self.fetch is None:
+            return
+        visible = self._visible()
+        start = max(0, top - self.OVERSCAN)
+        page = self.fetch(start, visible + 2 * self.OVERSCAN)
+        self.total = page.total
+        if start and start >= page.total:
+            # result shrank under us: jump to its end
+            start = max(0, page.total - visible - self.OVERSCAN)
+            page = self.fetch(start, visible + 2 * self.OVERSCAN)
+        keep = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for r in page.rows:
+            self.tree.insert("", "end", iid=str(r[self.key]), values=self.values(r))
+        self.start, self.count = start, len(page.rows)
+        self.top = min(max(top, start), max(start, start + self.count - visible))
+        keep &= {str(r[self.key]) for r in page.rows}
+        if keep:
+            self.tree.selection_set(tuple(keep))
+        if self.count:
+            self.tree.yview_moveto((self.top - start) / self.count)
+        self._update_scrollbar(visible)
+
+    def _update_scrollbar(self, visible: int):
+        total = self.total
+        if not total:
+            self.sb.set(0, 1)
+            self.label.configure(text="No rows")
+            return
+        last = min(total, self.top + visible)
+        self.sb.set(self.top / total, last / total)
+        self.label.configure(text=f"Rows {self.top + 1}-{last} of {total}")
+
+    def _on_tree_scrolled(self, first, last):
+        # native scrolling inside the window (wheel, keyboard, see())
+        if not self.count:
+            self._update_scrollbar(0)
+            return
+        first, last = float(first), float(last)
+        visible = max(1, round((last - first) * self.count))
+        self.top = self.start + int(round(first * self.count))
+        self._update_scrollbar(visible)
+        end = self.start + self.count
+        margin = self.OVERSCAN // 2
+        near_top = self.start > 0 and self.top - self.start < margin
+        near_end = end < self.total and end - (self.top + visible) < margin
+        if (near_top or near_end) and not self._pending:
+            self._pending = True
+            self.tree.after_idle(self._refill)
+
+    def _refill(self):
+        self._pending = False
+        self.scroll_to(self.top)
+
+    def _on_scrollbar(self, action, *args):
+        visible = self._visible()
+        if action == "moveto":
+            top = int(float(args[0]) * self.total)
+        else:
+            step = visible if args[1] == "pages" else 1
+            top = self.top + int(args[0]) * step
+        top = max(0, min(top, self.total - visible))
+        if self.start <= top and top + visible <= self.start + self.count:
+            self.tree.yview_moveto((top - self.start) / self.count)
+        else:
+            self.scroll_to(top)
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -22,9 +215,18 @@ class App(tk.Tk):
         self.geometry("1400x750")
         self.resizable(True, True)
 
-        self.rms = RMS()
+        # Rows are loaded on a worker thread and ingested in chunks (see start_load)
+        self.rms = RMS(self.make_storage(), load=False)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # status bar: load progress
+        status = ttk.Frame(self)
+        status.pack(side="bottom", fill="x")
+        self.lbl_status = ttk.Label(status, text="")
+        self.lbl_status.pack(side="left", padx=8)
+        self.progress = ttk.Progressbar(status, length=240, mode="indeterminate")
+        self.progress.pack(side="right", padx=8, pady=2)
+
         nb = ttk.Notebook(self)
         self.tab_clients = ttk.Frame(nb)
         self.tab_airlines = ttk.Frame(nb)
@@ -45,6 +247,256 @@ class App(tk.Tk):
         self.refresh_clients()
         self.refresh_airlines()
         self.refresh_flights()
+        # edits reach the lists as per-row events instead of full refreshes
+        self._combos_pending = False
+        self._combo_versions = {"airlines": self.rms.version("airlines")}
+        self.rms.subscribe(self.on_rms_change)
+        self.start_load()
+
+        # live search: debounced, run on one worker thread, newest query wins
+        self._search_pool = ThreadPoolExecutor(1, thread_name_prefix="rms-search")
+        self._search_results = queue.Queue()
+        self._search_polling = False
+        self._search = {
+            name: dict(entry=entry, after=None, gen=0, future=None)
+            for name, entry in (
+                ("clients", self.ent_client_search),
+                ("flights", self.ent_fsearch),
+            )
+        }
+        for name, st in self._search.items():
+            st["entry"].bind(
+                "<KeyRelease>", lambda e, n=name: self._on_search_key(n, e)
+            )
+            st["entry"].bind("<Return>", lambda e, n=name: self._launch_search(n, True))
+
+    @staticmethod
+    def make_storage():
+        # RMS_STORAGE=sqlite selects the SQLite backend. Default: journaled JSONL,
+        # where each edit appends one line, compacted in the background, with a
+        # columnar copy of each snapshot for fast cold starts.
+        # RMS_DURABILITY=none|batch|always picks the fsync policy (default batch).
+        durability = os.environ.get("RMS_DURABILITY", "batch").lower()
+        if os.environ.get("RMS_STORAGE", "").lower() == "sqlite":
+            return SqliteStorage(durability=durability)
+        return JsonlStorage(journal=True, columnar=True, durability=durability)
+
+    # ---- background loading ----
+    LOAD_CHUNK = 5000  # rows per queued chunk (worker -> Tk thread)
+    LOAD_QUEUE = 4  # chunks in flight: the worker waits when the Tk side lags
+    INGEST_STEP = 250  # rows per ingest() call, so a poll stays near its slice
+    LOAD_SLICE_MS = 40  # main-thread time per poll spent ingesting chunks
+
+    def start_load(self):
+        self.loading = True
+        self.load_error = None
+        self._load_queue = queue.Queue(maxsize=self.LOAD_QUEUE)
+        self._load_pending = None  # (table, rows, offset) being ingested
+        self._loaded_rows = 0
+        self.lbl_status.configure(text="Loading records…")
+        self.progress.start(15)
+        threading.Thread(
+            target=self._load_worker, name="rms-loader", daemon=True
+        ).start()
+        self.after(20, self._poll_load)
+
+    def _load_worker(self):
+        # worker thread: storage I/O + migration only; RMS is touched on the Tk thread
+        q, st = self._load_queue, self.rms.st
+        try:
+            for table in ("clients", "airlines", "flights"):
+                current = getattr(st, "schema_current", None)
+                if current is not None and not current(table):
+                    st.migrate_table(table)
+            # JSONL: bulk read of each table (columnar snapshot when fresh),
+            # then queued in chunks; other storage is streamed, so the first
+            # rows show up before the last are read
+            load_table = getattr(st, "load_table", None)
+            scan = getattr(st, "scan", None)
+            if scan is None:
+                scan = st.load_all().get  # whole tables, still queued in chunks
+            for table in ("clients", "airlines", "flights"):
+                if load_table is not None:
+                    rows = load_table(table)
+                    for i in range(0, len(rows), self.LOAD_CHUNK):
+                        q.put(("chunk", table, rows[i : i + self.LOAD_CHUNK]))
+                    continue
+                chunk = []
+                for r in scan(table):
+                    chunk.append(r)
+                    if len(chunk) == self.LOAD_CHUNK:
+                        q.put(("chunk", table, chunk))
+                        chunk = []
+                if chunk:
+                    q.put(("chunk", table, chunk))
+            q.put(("done",))
+        except Exception as e:
+            logging.exception("Background load failed")
+            q.put(("error", e))
+
+    def _poll_load(self):
+        deadline = time.monotonic() + self.LOAD_SLICE_MS / 1000
+        touched = set()
+        while time.monotonic() < deadline:
+            if self._load_pending is not None:
+                # ingest in small steps, so the slice is split by time
+                table, rows, i = self._load_pending
+                step = rows[i : i + self.INGEST_STEP]
+                self.rms.ingest(table, step)
+                touched.add(table)
+                self._loaded_rows += len(step)
+                i += len(step)
+                self._load_pending = (table, rows, i) if i < len(rows) else None
+                continue
+            try:
+                msg = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == "chunk":
+                self._load_pending = (msg[1], msg[2], 0)
+            elif msg[0] == "done":
+                self._finish_load(touched)
+                return
+            else:
+                self._finish_load(touched, error=msg[1])
+                messagebox.showerror("Load Failed", str(msg[1]))
+                return
+        self.lbl_status.configure(text=f"Loading records… {self._loaded_rows}")
+        # populate the tabs as chunks arrive (refetching only an unfilled window)
+        for table in touched:
+            self._lists()[table].grown(len(getattr(self.rms, table)))
+        self.after(20, self._poll_load)
+
+    def _finish_load(self, touched, error=None):
+        if error is None:
+            self.rms.finish_ingest()
+            self.loading = False
+            status = f"Loaded {self._loaded_rows} records"
+        else:
+            # partial data: id sequences, FK checks and cascades would be wrong,
+            # so `loading` stays set and the app stays read-only
+            self.load_error = error
+            status = f"Load failed after {self._loaded_rows} records (read-only)"
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.lbl_status.configure(text=status)
+        for table in touched:
+            self._lists()[table].reload()
+        self.refresh_combos()
+
+    # ---- live search ----
+    SEARCH_DEBOUNCE_MS = 250
+
+    def _on_search_key(self, name: str, evt):
+        if evt.keysym not in ("Return", "KP_Enter", "Escape"):
+            self._schedule_search(name)
+
+    def _schedule_search(self, name: str):
+        st = self._search[name]
+        if st["after"] is not None:
+            self.after_cancel(st["after"])
+        st["after"] = self.after(
+            self.SEARCH_DEBOUNCE_MS, lambda: self._launch_search(name)
+        )
+
+    def _launch_search(self, name: str, notify: bool = False):
+        st = self._search[name]
+        if st["after"] is not None:
+            self.after_cancel(st["after"])
+            st["after"] = None
+        # a newer query supersedes any queued or running one
+        st["gen"] += 1
+        if st["future"] is not None:
+            st["future"].cancel()
+            st["future"] = None
+        q = st["entry"].get().strip()
+        if not q:
+            if notify:
+                self.notify_if_empty([], name)
+            else:
+                self._show_search(name, "")
+            return
+        query = self.rms.query_clients if name == "clients" else self.rms.query_flights
+        gen = st["gen"]
+        # matching runs on the worker without holding rms.lock; the list then
+        # pages the cached result
+        fut = self._search_pool.submit(query, q, limit=1)
+        fut.add_done_callback(
+            lambda f: self._search_results.put((name, gen, q, notify, f))
+        )
+        st["future"] = fut
+        if not self._search_polling:
+            self._search_polling = True
+            self.after(20, self._poll_search)
+
+    def _poll_search(self):
+        # back on the Tk thread: apply only the newest result per list
+        while True:
+            try:
+                name, gen, q, notify, fut = self._search_results.get_nowait()
+            except queue.Empty:
+                break
+            st = self._search[name]
+            if gen != st["gen"] or fut.cancelled():
+                continue
+            st["future"] = None
+            try:
+                page = fut.result()
+            except Exception as e:
+                messagebox.showerror("Search Failed", str(e))
+                continue
+            if notify and self.notify_if_empty(page.rows, name):
+                continue
+            self._show_search(name, q)
+        if any(st["future"] is not None for st in self._search.values()):
+            self.after(20, self._poll_search)
+        else:
+            self._search_polling = False
+
+    def _show_search(self, name: str, q: str):
+        if name == "clients":
+            self.refresh_clients(q)
+        else:
+            self.refresh_flights(q)
+
+    def _ready(self) -> bool:
+        # edits wait until every row is loaded (ids, FKs and cascades need them all)
+        if self.load_error is not None:
+            messagebox.showerror(
+                "Read-only",
+                f"Records failed to load ({self.load_error}).\n"
+                "Editing is disabled until the app is restarted.",
+            )
+            return False
+        if self.loading:
+            messagebox.showinfo("Please wait", "Records are still loading.")
+            return False
+        return True
+
+    def _lists(self) -> dict:
+        return {
+            "clients": self.list_clients,
+            "airlines": self.list_airlines,
+            "flights": self.list_flights,
+        }
+
+    def on_rms_change(self, ev):
+        lst = self._lists()[ev.table]
+        if ev.kind == "delete":
+            lst.remove(ev.key)
+        else:
+            if ev.table == "flights":
+                row = self.rms.get_flight_enriched(ev.key)
+            elif ev.table == "clients":
+                row = self.rms.get_client(ev.key)
+            else:
+                row = self.rms.get_airline(ev.key)
+            if row is not None:
+                lst.upsert(ev.key, row, ev.kind == "insert")
+        if ev.table == "airlines" and not self._combos_pending:
+            # coalesce: one airline picker refresh per burst of edits
+            self._combos_pending = True
+            self.after_idle(self.refresh_combos)
 
     # ==============================================
     # Clients Tab
@@ -191,6 +643,12 @@ class App(tk.Tk):
         for c, w in (("Client ID", 100), ("Name", 260), ("Phone Number", 160)):
             self.tree_clients.heading(c, text=c)
             self.tree_clients.column(c, width=w, anchor="w")
+        self.list_clients = VirtualList(
+            right,
+            self.tree_clients,
+            lambda r: (r.get("client_id"), r.get("Name", ""), r.get("Phone", "")),
+            "client_id",
+        )
         self.tree_clients.pack(fill="both", expand=True, padx=0, pady=8)
         self.tree_clients.bind("<<TreeviewSelect>>", self.on_client_select)
 
@@ -298,16 +756,11 @@ class App(tk.Tk):
             Type="client",
         )
 
-    def refresh_clients(self, rows=None):
-        if rows is None:
-            rows = self.rms.clients
-        self.tree_clients.delete(*self.tree_clients.get_children())
-        for r in rows:
-            self.tree_clients.insert(
-                "",
-                "end",
-                values=(r.get("client_id"), r.get("Name", ""), r.get("Phone", "")),
-            )
+    def refresh_clients(self, q: str = ""):
+        def fetch(offset, limit):
+            return self.rms.query_clients(q, limit=limit, offset=offset)
+
+        self.list_clients.show(fetch, appends=not q)
 
     def on_client_select(self, _evt):
         sel = self.tree_clients.selection()
@@ -315,7 +768,7 @@ class App(tk.Tk):
             return
         vals = self.tree_clients.item(sel[0], "values")
         cid = int(vals[0])
-        r = self.rms._find(self.rms.clients, "client_id", cid) or {}
+        r = self.rms.get_client(cid) or {}
         # Fill form
         self.ent_client_id.configure(state="normal")
         self.ent_client_id.delete(0, "end")
@@ -340,18 +793,20 @@ class App(tk.Tk):
         self.ent_phone.insert(0, r.get("Phone", ""))
 
     def on_client_create(self):
+        if not self._ready():
+            return
         if not messagebox.askyesno("Confirm", "Create this client?"):
             return
         try:
             data = self._collect_client_form()
             r = self.rms.create_client(data)
             messagebox.showinfo("OK", f"Created client {r['client_id']}")
-            self.refresh_clients()
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_client_update(self):
+        if not self._ready():
+            return
         cid = self.ent_client_id.get().strip()
         if not cid:
             messagebox.showerror("Error", "No client selected")
@@ -362,11 +817,12 @@ class App(tk.Tk):
             data = self._collect_client_form()
             r = self.rms.update_client(int(cid), data)
             messagebox.showinfo("OK", f"Updated client {r['client_id']}")
-            self.refresh_clients()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_client_delete(self):
+        if not self._ready():
+            return
         cid = self.ent_client_id.get().strip()
         if not cid:
             messagebox.showerror("Error", "No client selected")
@@ -376,17 +832,11 @@ class App(tk.Tk):
         try:
             self.rms.delete_client(int(cid))
             messagebox.showinfo("OK", "Deleted.")
-            self.refresh_clients()
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_client_search(self):
-        q = self.ent_client_search.get().strip()
-        rows = self.rms.search_clients(q)
-        if self.notify_if_empty(rows, "clients"):
-            return
-        self.refresh_clients(rows)
+        self._launch_search("clients", notify=True)
 
     # ==============================================
     # Airlines Tab
@@ -466,15 +916,20 @@ class App(tk.Tk):
         for c, w in (("Airline ID", 180), ("Company Name", 360)):
             self.tree_airlines.heading(c, text=c)
             self.tree_airlines.column(c, width=w, anchor="w")
+        self.list_airlines = VirtualList(
+            right,
+            self.tree_airlines,
+            lambda r: (r.get("airline_id"), r.get("CompanyName", "")),
+            "airline_id",
+        )
         self.tree_airlines.pack(fill="both", expand=True, padx=0, pady=8)
         self.tree_airlines.bind("<<TreeviewSelect>>", self.on_airline_select)
 
     def refresh_airlines(self):
-        self.tree_airlines.delete(*self.tree_airlines.get_children())
-        for r in self.rms.airlines:
-            self.tree_airlines.insert(
-                "", "end", values=(r.get("airline_id"), r.get("CompanyName", ""))
-            )
+        def fetch(offset, limit):
+            return self.rms.query_airlines(limit=limit, offset=offset)
+
+        self.list_airlines.show(fetch, appends=True)
 
     def on_airline_select(self, _evt):
         sel = self.tree_airlines.selection()
@@ -482,7 +937,7 @@ class App(tk.Tk):
             return
         vals = self.tree_airlines.item(sel[0], "values")
         aid = int(vals[0])
-        r = self.rms._find(self.rms.airlines, "airline_id", aid) or {}
+        r = self.rms.get_airline(aid) or {}
 
         self.ent_airline_id.configure(state="normal")
         self.ent_airline_id.delete(0, "end")
@@ -493,17 +948,19 @@ class App(tk.Tk):
         self.ent_company.insert(0, r.get("CompanyName", ""))
 
     def on_airline_create(self):
+        if not self._ready():
+            return
         if not messagebox.askyesno("Confirm", "Create this airline?"):
             return
         try:
             r = self.rms.create_airline({"CompanyName": self.ent_company.get().strip()})
             messagebox.showinfo("OK", f"Created airline {r['airline_id']}")
-            self.refresh_airlines()
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_airline_update(self):
+        if not self._ready():
+            return
         aid = self.ent_airline_id.get().strip()
         if not aid:
             messagebox.showerror("Error", "No airline selected")
@@ -515,12 +972,12 @@ class App(tk.Tk):
                 int(aid), {"CompanyName": self.ent_company.get().strip()}
             )
             messagebox.showinfo("OK", f"Updated airline {r['airline_id']}")
-            self.refresh_airlines()
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_airline_delete(self):
+        if not self._ready():
+            return
         aid = self.ent_airline_id.get().strip()
         if not aid:
             messagebox.showerror("Error", "No airline selected")
@@ -530,8 +987,6 @@ class App(tk.Tk):
         try:
             self.rms.delete_airline(int(aid))
             messagebox.showinfo("OK", "Deleted.")
-            self.refresh_airlines()
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -567,8 +1022,9 @@ class App(tk.Tk):
 
         # Row 1: Client dropdown
         ttk.Label(form, text="Client").grid(row=1, column=0, sticky="w", padx=1, pady=4)
-        self.cmb_client = ttk.Combobox(
-            form, width=21, values=self.rms.list_clients_combo(), state="readonly"
+        self.cmb_client = ttk.Combobox(form, width=21, state="readonly")
+        self.cmb_client.configure(
+            postcommand=lambda: self._sync_client_combo(self.cmb_client)
         )
         self.cmb_client.grid(row=1, column=1, sticky="w", padx=1, pady=4)
 
@@ -576,10 +1032,12 @@ class App(tk.Tk):
         ttk.Label(form, text="Airline").grid(
             row=2, column=0, sticky="w", padx=1, pady=4
         )
+        # editable: typing filters the list by CompanyName prefix
         self.cmb_airline = ttk.Combobox(
-            form, width=21, values=self.rms.list_airlines_combo(), state="readonly"
+            form, width=21, values=self._airline_suggestions("")
         )
         self.cmb_airline.grid(row=2, column=1, sticky="w", padx=1, pady=4)
+        self._bind_airline_autocomplete(self.cmb_airline)
 
         # Row 3: Date dropdown
         years = [str(y) for y in range(2024, 2031)]
@@ -656,14 +1114,16 @@ class App(tk.Tk):
         ttk.Label(sbar, text="Filter by Client & Airline").grid(
             row=1, column=0, sticky="w"
         )
-        self.cmb_fk_client = ttk.Combobox(
-            sbar, width=31, values=self.rms.list_clients_combo(), state="readonly"
+        self.cmb_fk_client = ttk.Combobox(sbar, width=31, state="readonly")
+        self.cmb_fk_client.configure(
+            postcommand=lambda: self._sync_client_combo(self.cmb_fk_client)
         )
         self.cmb_fk_client.grid(row=1, column=1, sticky="w")
         self.cmb_fk_airline = ttk.Combobox(
-            sbar, width=31, values=self.rms.list_airlines_combo(), state="readonly"
+            sbar, width=31, values=self._airline_suggestions("")
         )
         self.cmb_fk_airline.grid(row=2, column=1, sticky="w")
+        self._bind_airline_autocomplete(self.cmb_fk_airline)
 
         # List
         cols = (
@@ -682,10 +1142,38 @@ class App(tk.Tk):
         for c, w in zip(cols, widths):
             self.tree_flights.heading(c, text=c)
             self.tree_flights.column(c, width=w, anchor="w")
+        self.list_flights = VirtualList(
+            right, self.tree_flights, self._flight_values, "ID"
+        )
         self.tree_flights.pack(fill="both", expand=True, pady=8)
         self.tree_flights.bind("<<TreeviewSelect>>", self.on_flight_select)
 
     # ---- flights helpers ----
+    AIRLINE_SUGGEST_LIMIT = 50
+
+    def _bind_airline_autocomplete(self, cmb: ttk.Combobox):
+        cmb.bind("<KeyRelease>", lambda e: self.on_airline_typed(cmb, e))
+        cmb.bind("<Return>", lambda e: self.on_airline_pick_first(cmb))
+
+    def on_airline_typed(self, cmb: ttk.Combobox, evt=None):
+        if evt is not None and evt.keysym in ("Up", "Down", "Return", "Escape"):
+            return
+        if self._pick_id_from_combo(cmb.get()) > 0:
+            return  # a full "id - name" entry is already selected
+        cmb.configure(values=self._airline_suggestions(cmb.get()))
+
+    def _airline_suggestions(self, text: str) -> List[str]:
+        # top AIRLINE_SUGGEST_LIMIT labels for the typed prefix (all when empty)
+        if self._pick_id_from_combo(text) > 0:
+            text = ""
+        rows = self.rms.suggest_airlines(text.strip(), self.AIRLINE_SUGGEST_LIMIT)
+        return [airline_label(a) for a in rows]
+
+    def on_airline_pick_first(self, cmb: ttk.Combobox):
+        values = cmb.cget("values")
+        if values and self._pick_id_from_combo(cmb.get()) <= 0:
+            cmb.set(values[0])
+
     @staticmethod
     def _pick_id_from_combo(txt: str) -> int:
         # "123 - Alice (138...)" -> 123
@@ -718,57 +1206,54 @@ class App(tk.Tk):
             Type="flight",
         )
 
-    def refresh_flights(self, rows=None):
-        if rows is None:
-            # enrich for display
-            rows = []
-            for f in self.rms.flights:
-                c = (
-                    self.rms._find(
-                        self.rms.clients, "client_id", int(f.get("client_id", 0))
-                    )
-                    or {}
-                )
-                a = (
-                    self.rms._find(
-                        self.rms.airlines, "airline_id", int(f.get("airline_id", 0))
-                    )
-                    or {}
-                )
-                rows.append(
-                    {
-                        "ID": f.get("ID"),
-                        "ClientName": c.get("Name", ""),
-                        "Phone": c.get("Phone", ""),
-                        "Airline": a.get("CompanyName", ""),
-                        "Date": f.get("Date", ""),
-                        "StartCity": f.get("StartCity", ""),
-                        "EndCity": f.get("EndCity", ""),
-                    }
-                )
-        self.tree_flights.delete(*self.tree_flights.get_children())
-        for r in rows:
-            self.tree_flights.insert(
-                "",
-                "end",
-                values=(
-                    r["ID"],
-                    r["ClientName"],
-                    r["Phone"],
-                    r["Airline"],
-                    r["Date"],
-                    r["StartCity"],
-                    r["EndCity"],
-                ),
+    @staticmethod
+    def _flight_values(r) -> tuple:
+        # rows come enriched from RMS (ClientName / Phone / Airline)
+        return (
+            r.get("ID"),
+            r.get("ClientName", ""),
+            r.get("Phone", ""),
+            r.get("Airline", ""),
+            r.get("Date", ""),
+            r.get("StartCity", ""),
+            r.get("EndCity", ""),
+        )
+
+    def refresh_flights(self, q: str = "", client_id=None, airline_id=None):
+        def fetch(offset, limit):
+            return self.rms.query_flights(
+                q,
+                client_id=client_id,
+                airline_id=airline_id,
+                limit=limit,
+                offset=offset,
             )
 
-        # Update dropdowns (to avoid lists not refreshing after create/delete)
-        self.cmb_client.configure(values=self.rms.list_clients_combo())
-        self.cmb_fk_client.configure(values=self.rms.list_clients_combo())
-        self.cmb_airline.configure(values=self.rms.list_airlines_combo())
-        self.cmb_fk_airline.configure(values=self.rms.list_airlines_combo())
+        self.list_flights.show(
+            fetch, appends=not q and client_id is None and airline_id is None
+        )
+
+    def refresh_combos(self):
+        self._combos_pending = False
+        # client pickers pull their labels when opened (_sync_client_combo)
+        version = self.rms.version("airlines")
+        if self._combo_versions.get("airlines") != version:
+            self._combo_versions["airlines"] = version
+            # re-run each picker's prefix filter on what the user has typed
+            for cmb in (self.cmb_airline, self.cmb_fk_airline):
+                cmb.configure(values=self._airline_suggestions(cmb.get()))
+
+    def _sync_client_combo(self, cmb: ttk.Combobox):
+        # RMS keeps the label list patched per row; Tk only needs a copy of it
+        # when the dropdown opens, and only if clients changed since the last one
+        version = self.rms.version("clients")
+        if self._combo_versions.get(str(cmb)) != version:
+            self._combo_versions[str(cmb)] = version
+            cmb.configure(values=self.rms.list_clients_combo())
 
     def on_save_all(self):
+        if not self._ready():
+            return
         try:
             self.rms.save_all()
         except Exception as e:
@@ -784,7 +1269,7 @@ class App(tk.Tk):
         if not sel:
             return
         fid = int(self.tree_flights.item(sel[0], "values")[0])
-        row = self.rms._find(self.rms.flights, "ID", fid) or {}
+        row = self.rms.get_flight(fid) or {}
 
         self.ent_fid.configure(state="normal")
         self.ent_fid.delete(0, "end")
@@ -792,22 +1277,14 @@ class App(tk.Tk):
         self.ent_fid.configure(state="readonly")
 
         # Restore form
-        c = (
-            self.rms._find(self.rms.clients, "client_id", int(row.get("client_id", 0)))
-            or {}
-        )
-        a = (
-            self.rms._find(
-                self.rms.airlines, "airline_id", int(row.get("airline_id", 0))
-            )
-            or {}
-        )
+        c = self.rms.get_client(row.get("client_id")) or {}
+        a = self.rms.get_airline(row.get("airline_id")) or {}
         if c:
             self.cmb_client.set(
                 f'{c["client_id"]} - {c.get("Name","")} ({c.get("Phone","")})'
             )
         if a:
-            self.cmb_airline.set(f'{a["airline_id"]} - {a.get("CompanyName","")}')
+            self.cmb_airline.set(airline_label(a))
 
         dt = row.get("Date", "2025-01-01 00:00")
         try:
@@ -825,17 +1302,20 @@ class App(tk.Tk):
         self.cmb_end.set(row.get("EndCity", ""))
 
     def on_flight_create(self):
+        if not self._ready():
+            return
         if not messagebox.askyesno("Confirm", "Create this flight?"):
             return
         try:
             data = self._collect_flight_form()
             f = self.rms.create_flight(data)
             messagebox.showinfo("OK", f"Created flight {f['ID']}")
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_flight_update(self):
+        if not self._ready():
+            return
         fid = self.ent_fid.get().strip()
         if not fid:
             messagebox.showerror("Error", "No flight selected")
@@ -846,11 +1326,12 @@ class App(tk.Tk):
             data = self._collect_flight_form()
             f = self.rms.update_flight(int(fid), data)
             messagebox.showinfo("OK", f"Updated flight {f['ID']}")
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_flight_delete(self):
+        if not self._ready():
+            return
         fid = self.ent_fid.get().strip()
         if not fid:
             messagebox.showerror("Error", "No flight selected")
@@ -860,16 +1341,11 @@ class App(tk.Tk):
         try:
             self.rms.delete_flight(int(fid))
             messagebox.showinfo("OK", "Deleted.")
-            self.refresh_flights()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_flight_search(self):
-        q = self.ent_fsearch.get().strip()
-        rows = self.rms.search_flights(q)
-        if self.notify_if_empty(rows, "flights"):
-            return
-        self.refresh_flights(rows)
+        self._launch_search("flights", notify=True)
 
     def on_flight_search_fk(self):
         cid = self._pick_id_from_combo(self.cmb_fk_client.get())
@@ -877,32 +1353,20 @@ class App(tk.Tk):
         if cid <= 0 or aid <= 0:
             messagebox.showerror("Error", "Please pick both Client and Airline")
             return
-        rows = self.rms.search_flights_by_fk(cid, aid)
-        if self.notify_if_empty(rows, "flights for the selected client & airline"):
-            self.refresh_flights([])
-            return
-        # rows are original flights with enhancements; convert directly to display structure
-        disp = [
-            {
-                "ID": r["ID"],
-                "ClientName": r.get("ClientName", ""),
-                "Phone": r.get("Phone", ""),
-                "Airline": r.get("Airline", ""),
-                "Date": r.get("Date", ""),
-                "StartCity": r.get("StartCity", ""),
-                "EndCity": r.get("EndCity", ""),
-            }
-            for r in rows
-        ]
-        self.refresh_flights(disp)
+        page = self.rms.query_flights(client_id=cid, airline_id=aid, limit=1)
+        # an empty result still clears the list
+        self.notify_if_empty(page.rows, "flights for the selected client & airline")
+        self.refresh_flights(client_id=cid, airline_id=aid)
 
     def on_close(self):
         try:
             self.rms.save_all()
+            self.rms.close()
         except Exception as e:
             messagebox.showerror("Save All Failed", str(e))
             return
         else:
+            self._search_pool.shutdown(wait=False, cancel_futures=True)
             self.destroy()
 
 
@@ -0,0 +1,110 @@
+# columnar.py
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# header: magic, JSONL snapshot size + mtime_ns it was built from, crc32, length
+MAGIC = b"RMSCOL01"
+HEADER = struct.Struct("<8sQQIQ")
+# string column slot for a row without the field
+MISSING = 0xFFFFFFFF
+
+
+class _Missing:
+    pass
+
+
+def _column(rows: List[dict], name: str, pool: Dict[str, int]) -> Optional[tuple]:
+    """(kind, has_missing, array) for one column, or None if it fits neither kind."""
+    vals = [r.get(name, _Missing) for r in rows]
+    if all(type(v) is int for v in vals):
+        try:
+            return "i", False, array("q", vals)
+        except OverflowError:
+            return None
+    if not all(v is _Missing or type(v) is str for v in vals):
+        return None
+    idx = array("I")
+    for v in vals:
+        idx.append(MISSING if v is _Missing else pool.setdefault(v, len(pool)))
+    return "s", _Missing in vals, idx
+
+
+def dumps(rows: List[dict], sig: Sequence[int]) -> Optional[bytes]:
+    """
+    Encode a table column-wise: int columns as int64 arrays, str columns as
+    uint32 indexes into one interned string pool. None if a column holds
+    other value types (the table then stays JSONL-only).
+    """
+    names: Dict[str, None] = {}
+    for r in rows:
+        names.update(dict.fromkeys(r))
+    pool: Dict[str, int] = {}
+    cols = []
+    for name in names:
+        col = _column(rows, name, pool)
+        if col is None:
+            return None
+        cols.append((name, *col))
+    chunks = []
+    for _, _, _, arr in cols:
+        if sys.byteorder == "big":
+            arr.byteswap()
+        chunks.append(arr.tobytes())
+    head = {
+        "rows": len(rows),
+        "columns": [[n, k, m, len(c)] for (n, k, m, _), c in zip(cols, chunks)],
+    }
+    parts = [json.dumps(head), json.dumps(list(pool), ensure_ascii=False)]
+    meta = "\n".join(parts).encode("utf-8")
+    payload = struct.pack("<I", len(meta)) + meta + b"".join(chunks)
+    crc = zlib.crc32(payload)
+    return HEADER.pack(MAGIC, sig[0], sig[1], crc, len(payload)) + payload
+
+
+def loads(data: bytes) -> Tuple[List[int], List[dict]]:
+    """Decode dumps() output to ([size, mtime_ns], rows); ValueError if damaged."""
+    try:
+        magic, size, mtime_ns, crc, length = HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError("truncated header")
+    payload = memoryview(data)[HEADER.size :]
+    if magic != MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError("bad magic or checksum")
+    (n,) = struct.unpack_from("<I", payload)
+    head_json, pool_json = bytes(payload[4 : 4 + n]).decode("utf-8").split("\n", 1)
+    head, pool = json.loads(head_json), json.loads(pool_json)
+    pool.append(_Missing)  # MISSING slots are remapped to this last entry
+    names, cols, sparse = [], [], False
+    pos = 4 + n
+    for name, kind, has_missing, nbytes in head["columns"]:
+        arr = array("q" if kind == "i" else "I")
+        arr.frombytes(payload[pos : pos + nbytes])
+        pos += nbytes
+        if sys.byteorder == "big":
+            arr.byteswap()
+        if kind == "s":
+            if has_missing:
+                sparse = True
+                last = len(pool) - 1
+                arr = [last if i == MISSING else i for i in arr]
+            col = [pool[i] for i in arr]
+        else:
+            col = arr.tolist()
+        if len(col) != head["rows"]:
+            raise ValueError(f"column {name} has {len(col)} rows")
+        names.append(name)
+        cols.append(col)
+    if not cols:
+        return [size, mtime_ns], [{} for _ in range(head["rows"])]
+    if sparse:
+        rows = [
+            {k: v for k, v in zip(names, vals) if v is not _Missing}
+            for vals in zip(*cols)
+        ]
+    else:
+        rows = [dict(zip(names, vals)) for vals in zip(*cols)]
+    return [size, mtime_ns], rows
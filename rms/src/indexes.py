@@ -0,0 +1,193 @@
+# indexes.py
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class NgramIndex:
+    """
+    Inverted index of character n-grams -> record ids, for substring search.
+    - add(key, *fields): index the lower-cased fields of one record
+    - search(q): ids whose fields contain q; posting lists are intersected
+      (rarest first) and the candidates verified against the stored text
+    - candidates(q) / matches(q, texts): search() in two steps, so the
+      verification can run without the caller's lock
+    Queries shorter than n use the postings of every gram that contains them.
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._postings: Dict[str, Set[int]] = {}
+        self._fields: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _grams(self, text: str) -> Set[str]:
+        n = self.n
+        if len(text) <= n:
+            return {text} if text else set()
+        return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, key: int, *fields: str):
+        if key in self._fields:
+            self.remove(key)
+        texts = tuple(str(f or "").lower() for f in fields)
+        self._fields[key] = texts
+        for text in texts:
+            for g in self._grams(text):
+                self._postings.setdefault(g, set()).add(key)
+
+    def remove(self, key: int):
+        texts = self._fields.pop(key, None)
+        if texts is None:
+            return
+        for text in texts:
+            for g in self._grams(text):
+                ids = self._postings.get(g)
+                if ids is not None:
+                    ids.discard(key)
+                    if not ids:
+                        del self._postings[g]
+
+    def search(self, q: str) -> Set[int]:
+        return self.matches(q, self.candidates(q))
+
+    def candidates(self, q: str) -> Dict[int, Tuple[str, ...]]:
+        """Stored text of the records search(q) has to verify. A copy, so
+        matches() can run on it while the index keeps changing."""
+        q = (q or "").lower()
+        if not q:
+            return {}
+        if len(q) >= self.n:
+            lists = []
+            for g in self._grams(q):
+                ids = self._postings.get(g)
+                if not ids:
+                    return {}
+                lists.append(ids)
+            lists.sort(key=len)
+            cand: Iterable[int] = lists[0].intersection(*lists[1:])
+        else:
+            cand = set()
+            for g, ids in self._postings.items():
+                if q in g:
+                    cand |= ids
+        fields = self._fields
+        return {k: fields[k] for k in cand}
+
+    @staticmethod
+    def matches(q: str, texts: Dict[int, Tuple[str, ...]]) -> Set[int]:
+        q = (q or "").lower()
+        return {k for k, fields in texts.items() if any(q in t for t in fields)}
+
+
+class PrefixIndex:
+    """
+    Sorted (normalised text, id) list for prefix / autocomplete lookups.
+    Text is whitespace-collapsed and case-folded; a lookup is one bisect plus
+    the number of ids returned.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []
+        self._text: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def normalise(text: str) -> str:
+        return " ".join(str(text or "").split()).casefold()
+
+    def add(self, key: int, text: str):
+        if key in self._text:
+            self.remove(key)
+        norm = self.normalise(text)
+        self._text[key] = norm
+        insort(self._keys, (norm, key))
+
+    def remove(self, key: int):
+        norm = self._text.pop(key, None)
+        if norm is None:
+            return
+        i = bisect_left(self._keys, (norm, key))
+        if i < len(self._keys) and self._keys[i] == (norm, key):
+            del self._keys[i]
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        p = self.normalise(prefix)
+        keys = self._keys
+        i = bisect_left(keys, (p,))
+        out: List[int] = []
+        while i < len(keys) and keys[i][0].startswith(p):
+            if limit is not None and len(out) >= limit:
+                break
+            out.append(keys[i][1])
+            i += 1
+        return out
+
+
+class SortedIndex:
+    """
+    Sorted (sort key, id) list for range scans, e.g. flights by departure time.
+    add/remove are a bisect plus a list insert/delete; add_many bulk-loads
+    with one sort and remove_many drops many ids with one pass; range(lo, hi)
+    returns ids with lo <= key < hi in key order (either bound may be None).
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[Any, int]] = []
+        self._sort: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: int, value: Any):
+        if key in self._sort:
+            self.remove(key)
+        self._sort[key] = value
+        insort(self._keys, (value, key))
+
+    def add_many(self, items: Iterable[Tuple[int, Any]]):
+        """Bulk add of (id, value) pairs: one sort instead of an insort per row."""
+        fresh = []
+        for key, value in items:
+            if key in self._sort:
+                self.remove(key)
+            self._sort[key] = value
+            fresh.append((value, key))
+        self._keys.extend(fresh)
+        self._keys.sort()  # already-sorted run + new tail: timsort merges them
+
+    def remove(self, key: int):
+        value = self._sort.pop(key, None)
+        if value is None:
+            return
+        i = bisect_left(self._keys, (value, key))
+        if i < len(self._keys) and self._keys[i] == (value, key):
+            del self._keys[i]
+
+    def remove_many(self, keys: Iterable[int]):
+        """Bulk remove: past a few ids, one filtering pass over the list."""
+        gone = {}
+        for key in keys:
+            value = self._sort.pop(key, None)
+            if value is not None:
+                gone[key] = value
+        if len(gone) > 32:
+            self._keys = [e for e in self._keys if e[1] not in gone]
+            return
+        for key, value in gone.items():
+            i = bisect_left(self._keys, (value, key))
+            if i < len(self._keys) and self._keys[i] == (value, key):
+                del self._keys[i]
+
+    def range(
+        self, lo: Any = None, hi: Any = None, limit: Optional[int] = None
+    ) -> List[int]:
+        keys = self._keys
+        i = 0 if lo is None else bisect_left(keys, (lo,))
+        j = len(keys) if hi is None else bisect_left(keys, (hi,))
+        if limit is not None:
+            j = min(j, i + max(limit, 0))
+        return [k for _, k in keys[i:j]]
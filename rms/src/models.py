@@ -1,5 +1,5 @@
 from dataclasses import asdict, dataclass, field
-from typing import Dict
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -54,3 +54,22 @@ class Flight:
         d = asdict(self)
         d["Type"] = "flight"
         return d
+
+
+@dataclass
+class Page:
+    """one page of a query：rows plus total count and an opaque next cursor"""
+
+    rows: List[Dict]
+    total: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """row change published by RMS：kind is insert / update / delete"""
+
+    table: str
+    kind: str
+    key: int
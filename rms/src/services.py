@@ -1,7 +1,13 @@
 # services.py
+import base64
+import functools
+import json
 import logging
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from catalogs import (
     CITY_CATALOG,
@@ -10,8 +16,9 @@ from catalogs import (
     COUNTRY_TO_CITIES,
     COUNTRY_TO_STATES,
 )
-from models import Airline, Client, Flight
-from storage import JsonlStorage
+from indexes import NgramIndex, PrefixIndex, SortedIndex
+from models import Airline, ChangeEvent, Client, Flight, Page
+from storage import TABLE_KEYS, JsonlStorage, Storage
 
 # import validators.py
 from validators import (
@@ -28,6 +35,48 @@ from validators import (
 
 log = logging.getLogger(__name__)
 
+TABLES = ("clients", "airlines", "flights")
+
+
+def synchronized(method):
+    """Run an RMS method under self.lock (queries may run on worker threads)."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def flight_time(value) -> Optional[datetime]:
+    """Parse a flight Date ("YYYY-MM-DD HH:MM"); datetimes pass through."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+def city_key(city) -> str:
+    """Route-index key for a city name: whitespace-collapsed, case-folded."""
+    return " ".join(str(city or "").split()).casefold()
+
+
+def airline_label(a: Dict) -> str:
+    # combo box text: "airline_id - CompanyName"
+    return f'{a["airline_id"]} - {a.get("CompanyName","")}'
+
+
+def client_label(c: Dict) -> str:
+    # combo box text: "client_id - Name (Phone)"
+    return f'{c["client_id"]} - {c.get("Name","")} ({c.get("Phone","")})'
+
+
+COMBO_LABELS = {"clients": client_label, "airlines": airline_label}
+
+
 REQUIRED_CLIENT_FIELDS = (
     "Name",
     "Address1",
@@ -40,12 +89,363 @@ REQUIRED_CLIENT_FIELDS = (
 
 
 class RMS:
-    def __init__(self, storage: Optional[JsonlStorage] = None):
+    def __init__(self, storage: Optional[Storage] = None, load: bool = True):
         self.st = storage or JsonlStorage()
-        data = self.st.load_all()
+        # guards every index: mutations and worker-thread queries hold it
+        self.lock = threading.RLock()
+        # load=False: start empty and receive rows through ingest()
+        data = self.st.load_all() if load else {}
         self.clients: List[dict] = data.get("clients", [])
         self.airlines: List[dict] = data.get("airlines", [])
         self.flights: List[dict] = data.get("flights", [])
+        # row-level changes since the last save (used by journaled storage)
+        self._changes: List[dict] = []
+        # storage Future of the last row-level save (durability)
+        self._commit: Optional[Any] = None
+        # transaction(): nesting depth, undo log and buffered change events
+        self._tx_depth = 0
+        self._undo: Optional[List[tuple]] = None
+        self._events: Optional[List[tuple]] = None
+        # per-table version counters; a table is dirty while version != saved
+        self._versions: Dict[str, int] = {t: 0 for t in TABLES}
+        self._saved_versions: Dict[str, int] = dict(self._versions)
+        # primary-key indexes: id -> row, id -> list position (None = stale)
+        self._by_id: Dict[str, Dict[int, dict]] = {}
+        self._pos: Dict[str, Optional[Dict[int, int]]] = {}
+        # reverse FK indexes: client / airline / (client, airline) -> flight ids
+        self._flights_by_client: Dict[int, Set[int]] = {}
+        self._flights_by_airline: Dict[int, Set[int]] = {}
+        self._flights_by_pair: Dict[Tuple[int, int], Set[int]] = {}
+        # route indexes: (StartCity, EndCity) / either city -> flight ids
+        self._flights_by_route: Dict[Tuple[str, str], Set[int]] = {}
+        self._flights_by_city: Dict[str, Set[int]] = {}
+        # materialized join: flight id -> flight + ClientName/Phone/Airline,
+        # kept in flights list order
+        self._flight_view: Dict[int, dict] = {}
+        # trigram index over client Name / Phone for substring search
+        self._client_text = NgramIndex(3)
+        # sorted CompanyName index for airline autocomplete
+        self._airline_names = PrefixIndex()
+        # flights ordered by departure time (parsed Date)
+        self._flights_by_time = SortedIndex()
+        # (table, sort_key) -> (versions, sorted [(sort value, id)]) for paging
+        self._sort_cache: Dict[Tuple[str, str], Tuple[tuple, list]] = {}
+        # the default (id) order of each table, same shape, patched per row;
+        # tables listed in _id_unsorted got out-of-order ids and sort on read
+        self._id_order: Dict[str, list] = {t: [] for t in TABLES}
+        self._id_unsorted: Set[str] = set()
+        # recent filtered query results, same shape, keyed by (table, filter, sort)
+        self._result_cache: Dict[tuple, Tuple[tuple, list]] = {}
+        # combo display labels, parallel to the clients / airlines lists;
+        # built on first use, then patched per row
+        self._combo: Dict[str, List[str]] = {}
+        # change listeners, called with a ChangeEvent per inserted/updated/deleted row
+        self._listeners: List[Callable[[ChangeEvent], None]] = []
+        # (fid, when) pairs collected during bulk loads, see _flush_time_batch
+        self._time_batch: Optional[List[tuple]] = None
+        self._rebuild_indexes()
+        # id sequences: next id per table, seeded once, persisted as high-water marks
+        self._next_ids: Dict[str, int] = {}
+        self._seed_sequences()
+
+    # ----------indexes ----------
+    def _rebuild_indexes(self):
+        """Normalise ids to int once and (re)build every index."""
+        self._by_id = {t: {} for t in TABLES}
+        self._pos = {t: None for t in TABLES}
+        self._flights_by_client = {}
+        self._flights_by_airline = {}
+        self._flights_by_pair = {}
+        self._flights_by_route = {}
+        self._flights_by_city = {}
+        self._flight_view = {}
+        self._client_text = NgramIndex(3)
+        self._airline_names = PrefixIndex()
+        self._flights_by_time = SortedIndex()
+        self._combo = {}
+        self._id_order = {t: [] for t in TABLES}
+        self._id_unsorted = set()
+        # parents first, so flights enrich against indexed clients / airlines
+        self._time_batch = []
+        for t in TABLES:
+            for r in getattr(self, t):
+                self._accept_row(t, r)
+        self._flush_time_batch()
+
+    def _flush_time_batch(self):
+        # bulk loads collect (fid, when) pairs and sort once (no per-row insort)
+        batch, self._time_batch = self._time_batch, None
+        if batch:
+            self._flights_by_time.add_many(batch)
+
+    def _accept_row(self, table: str, r: dict):
+        """Index one loaded row; rows with a bad or duplicate id stay unindexed."""
+        key = TABLE_KEYS[table]
+        try:
+            r[key] = int(r[key])
+        except Exception:
+            log.warning("Skip %s row with bad %s: %s", table, key, r)
+            return
+        if table == "flights":
+            for fk in ("client_id", "airline_id"):
+                try:
+                    r[fk] = int(r.get(fk, 0))
+                except Exception:
+                    pass
+        by_id = self._by_id[table]
+        if r[key] not in by_id:
+            by_id[r[key]] = r
+            self._order_add(table, r[key])
+            self._index_row(table, r)
+
+    # ----------incremental loading ----------
+    @synchronized
+    def ingest(self, table: str, rows: List[dict]):
+        """
+        Add one chunk of already-persisted rows (background loading).
+        Nothing is journaled or published; call finish_ingest() after the
+        last chunk. Load parents (clients, airlines) before flights.
+        """
+        getattr(self, table).extend(rows)
+        self._time_batch = []
+        for r in rows:
+            self._accept_row(table, r)
+        self._flush_time_batch()
+        self._pos[table] = None
+        self._combo.pop(table, None)
+        # new version (sort caches) without making the table dirty
+        self._versions[table] += 1
+        self._saved_versions[table] = self._versions[table]
+
+    @synchronized
+    def finish_ingest(self):
+        self._seed_sequences()
+
+    # secondary indexes hang off these two hooks
+    def _index_row(self, table: str, row: dict):
+        if table == "flights":
+            fid, cid, aid = row["ID"], row.get("client_id"), row.get("airline_id")
+            self._flights_by_client.setdefault(cid, set()).add(fid)
+            self._flights_by_airline.setdefault(aid, set()).add(fid)
+            self._flights_by_pair.setdefault((cid, aid), set()).add(fid)
+            src, dst = city_key(row.get("StartCity")), city_key(row.get("EndCity"))
+            self._flights_by_route.setdefault((src, dst), set()).add(fid)
+            for city in (src, dst):
+                self._flights_by_city.setdefault(city, set()).add(fid)
+            self._flight_view[fid] = self._enrich(row)
+            when = flight_time(row.get("Date"))
+            if when is not None:
+                if self._time_batch is not None:
+                    self._time_batch.append((fid, when))
+                else:
+                    self._flights_by_time.add(fid, when)
+        elif table == "clients":
+            self._client_text.add(row["client_id"], row.get("Name"), row.get("Phone"))
+            self._patch_view(
+                self._flights_by_client.get(row["client_id"], ()),
+                ClientName=row.get("Name", ""),
+                Phone=row.get("Phone", ""),
+            )
+        elif table == "airlines":
+            self._airline_names.add(row["airline_id"], row.get("CompanyName", ""))
+            self._patch_view(
+                self._flights_by_airline.get(row["airline_id"], ()),
+                Airline=row.get("CompanyName", ""),
+            )
+
+    def _patch_view(self, fids: Iterable[int], **fields):
+        # copy-on-write, so rows handed out earlier stay unchanged
+        view = self._flight_view
+        for fid in fids:
+            if any(view[fid].get(k) != v for k, v in fields.items()):
+                view[fid] = {**view[fid], **fields}
+                self._emit("flights", "update", fid)
+
+    def _unindex_row(self, table: str, row: dict, deleted: bool = True):
+        if table == "flights":
+            if deleted:
+                # on replace the view entry is overwritten in place (keeps order)
+                self._flight_view.pop(row["ID"], None)
+            self._flights_by_time.remove(row["ID"])
+            fid, cid, aid = row["ID"], row.get("client_id"), row.get("airline_id")
+            src, dst = city_key(row.get("StartCity")), city_key(row.get("EndCity"))
+            for idx, k in (
+                (self._flights_by_client, cid),
+                (self._flights_by_airline, aid),
+                (self._flights_by_pair, (cid, aid)),
+                (self._flights_by_route, (src, dst)),
+                (self._flights_by_city, src),
+                (self._flights_by_city, dst),
+            ):
+                ids = idx.get(k)
+                if ids is not None:
+                    ids.discard(fid)
+                    if not ids:
+                        del idx[k]
+        elif table == "clients":
+            self._client_text.remove(row["client_id"])
+        elif table == "airlines":
+            self._airline_names.remove(row["airline_id"])
+
+    def _seed_sequences(self):
+        read_meta = getattr(self.st, "read_meta", None)
+        saved = (read_meta() if read_meta else {}).get("next_id", {})
+        for t in TABLES:
+            n = max(self._by_id[t], default=0) + 1
+            try:
+                n = max(n, int(saved.get(t, 1)))
+            except Exception:
+                pass
+            self._next_ids[t] = n
+        self._saved_next_ids = dict(self._next_ids)
+        self._next_ids_due = False
+
+    def _alloc_id(self, table: str) -> int:
+        # O(1); ids are never reused, even after deleting the newest row
+        n = self._next_ids[table]
+        self._next_ids[table] = n + 1
+        return n
+
+    def _get(self, table: str, val) -> Optional[dict]:
+        try:
+            return self._by_id[table].get(int(val))
+        except (TypeError, ValueError):
+            return None
+
+    def _position(self, table: str, val: int) -> int:
+        pos = self._pos[table]
+        if pos is None:
+            # rebuilt lazily after deletes shifted the list
+            key = TABLE_KEYS[table]
+            pos = {}
+            for i, r in enumerate(getattr(self, table)):
+                if isinstance(r.get(key), int):
+                    pos.setdefault(r[key], i)
+            self._pos[table] = pos
+        return pos.get(val, -1)
+
+    def _table_of(self, rows: List[dict], key: str) -> Optional[str]:
+        for t in TABLES:
+            if rows is getattr(self, t) and TABLE_KEYS[t] == key:
+                return t
+        return None
+
+    def get_client(self, client_id: int) -> Optional[dict]:
+        return self._get("clients", client_id)
+
+    def get_airline(self, airline_id: int) -> Optional[dict]:
+        return self._get("airlines", airline_id)
+
+    def get_flight(self, flight_id: int) -> Optional[dict]:
+        return self._get("flights", flight_id)
+
+    # ----------row primitives (keep indexes and change log in sync) ----------
+    def _insert_row(self, table: str, row: dict):
+        key = row[TABLE_KEYS[table]]
+        rows = getattr(self, table)
+        pos = self._pos[table]
+        if pos is not None:
+            pos[key] = len(rows)
+        rows.append(row)
+        self._by_id[table][key] = row
+        self._order_add(table, key)
+        labels = self._combo.get(table)
+        if labels is not None:
+            labels.append(COMBO_LABELS[table](row))
+        self._index_row(table, row)
+        self._log_change(table, "put", key, row)
+        if self._undo is not None:
+            self._undo.append(("insert", table, key))
+        self._emit(table, "insert", key)
+
+    def _replace_row(self, table: str, row: dict) -> dict:
+        key = row[TABLE_KEYS[table]]
+        idx = self._position(table, key)
+        rows = getattr(self, table)
+        old = rows[idx]
+        rows[idx] = row
+        self._by_id[table][key] = row
+        labels = self._combo.get(table)
+        if labels is not None:
+            labels[idx] = COMBO_LABELS[table](row)
+        self._unindex_row(table, old, deleted=False)
+        self._index_row(table, row)
+        self._log_change(table, "put", key, row)
+        if self._undo is not None:
+            self._undo.append(("replace", table, old))
+        self._emit(table, "update", key)
+        return old
+
+    def _delete_rows(self, table: str, keys: Iterable[int]) -> List[dict]:
+        doomed = {k: self._by_id[table].pop(k) for k in keys}
+        if not doomed:
+            return []
+        if self._undo is not None:
+            # original positions, ascending, so a rollback can re-insert in place
+            at = [(self._position(table, k), r) for k, r in doomed.items()]
+            at = sorted((p for p in at if p[0] >= 0), key=lambda p: p[0])
+            self._undo.append(("delete", table, at))
+        rows = getattr(self, table)
+        labels = self._combo.get(table)
+        if len(doomed) <= 32:
+            idxs = sorted((self._position(table, k) for k in doomed), reverse=True)
+            for i in idxs:
+                if i >= 0:
+                    del rows[i]
+                    if labels is not None:
+                        del labels[i]
+        else:
+            key = TABLE_KEYS[table]
+            rows[:] = [r for r in rows if r.get(key) not in doomed]
+            self._combo.pop(table, None)
+        self._pos[table] = None
+        self._order_remove(table, doomed)
+        if table == "flights":
+            # one pass for a cascade; _unindex_row's remove() then finds nothing
+            self._flights_by_time.remove_many(doomed)
+        if max(doomed) >= self._saved_next_ids.get(table, 1):
+            self._next_ids_due = True  # an id the saved mark does not cover
+        for k, row in doomed.items():
+            self._unindex_row(table, row)
+            self._log_change(table, "delete", k)
+            self._emit(table, "delete", k)
+        return list(doomed.values())
+
+    def _restore_row(self, table: str, idx: int, row: dict):
+        # rollback of a delete: back at its old position, no change logged
+        getattr(self, table).insert(idx, row)
+        self._by_id[table][row[TABLE_KEYS[table]]] = row
+        self._order_add(table, row[TABLE_KEYS[table]])
+        self._pos[table] = None
+        labels = self._combo.get(table)
+        if labels is not None:
+            labels.insert(idx, COMBO_LABELS[table](row))
+        self._index_row(table, row)
+        self._versions[table] += 1
+
+    def _order_add(self, table: str, key: int):
+        # ids are allocated ascending, so this is nearly always an append
+        order = self._id_order[table]
+        if order and key < order[-1][1]:
+            self._id_unsorted.add(table)
+        order.append(((0, key), key))
+
+    def _order_remove(self, table: str, keys: Dict[int, dict]):
+        order = self._id_entries(table)
+        if len(keys) > 32:
+            order[:] = [e for e in order if e[1] not in keys]
+            return
+        for k in keys:
+            i = bisect_left(order, ((0, k), k))
+            if i < len(order) and order[i][1] == k:
+                del order[i]
+
+    def _id_entries(self, table: str) -> list:
+        order = self._id_order[table]
+        if table in self._id_unsorted:
+            self._id_unsorted.discard(table)
+            order.sort()  # nearly sorted: one timsort run merge
+        return order
 
     # ----------common tools ----------
     def _next_id(self, rows: List[dict], key: str) -> int:
@@ -58,6 +458,9 @@ class RMS:
         return n
 
     def _find(self, rows: List[dict], key: str, val: int) -> Optional[dict]:
+        t = self._table_of(rows, key)
+        if t:
+            return self._get(t, val)
         for r in rows:
             try:
                 if int(r.get(key, -1)) == int(val):
@@ -69,6 +472,10 @@ class RMS:
     def _index_of(
         self, rows: List[dict], key: str, val: int
     ) -> Tuple[int, Optional[dict]]:
+        t = self._table_of(rows, key)
+        if t:
+            row = self._get(t, val)
+            return (self._position(t, row[key]), row) if row else (-1, None)
         for i, r in enumerate(rows):
             try:
                 if int(r.get(key, -1)) == int(val):
@@ -77,12 +484,72 @@ class RMS:
                 pass
         return -1, None
 
+    def _log_change(self, table: str, op: str, key: int, row: Optional[dict] = None):
+        entry = {"op": op, "table": table, "key": key}
+        if row is not None:
+            entry["row"] = row
+        self._changes.append(entry)
+        self._versions[table] += 1
+
+    # ----------change events ----------
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Call `callback(ChangeEvent)` after each row change; returns unsubscribe."""
+        self._listeners.append(callback)
+
+        def unsubscribe():
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+        return unsubscribe
+
+    def _emit(self, table: str, kind: str, key: int):
+        if not self._listeners:
+            return
+        if self._events is not None:
+            self._events.append((table, kind, key))  # published on commit
+            return
+        ev = ChangeEvent(table, kind, key)
+        for cb in list(self._listeners):
+            try:
+                cb(ev)
+            except Exception:
+                log.exception("Change listener failed for %s", ev)
+
+    def version(self, table: str) -> int:
+        return self._versions[table]
+
+    def dirty_tables(self) -> List[str]:
+        return [t for t in TABLES if self._versions[t] != self._saved_versions[t]]
+
     def _maybe_save(self):
-        self.st.write_clients(self.clients)
-        self.st.write_airlines(self.airlines)
-        self.st.write_flights(self.flights)
+        # Row-level storage (journaled JSONL, SQLite) only needs the changed
+        # rows; otherwise rewrite the tables that actually changed.
+        if self._tx_depth:
+            return  # deferred to the end of the transaction
+        if getattr(self.st, "row_level", False):
+            if self._changes:
+                self._commit = self.st.apply(self._changes)
+        else:
+            for t in self.dirty_tables():
+                getattr(self.st, f"write_{t}")(getattr(self, t))
+        self._changes = []
+        self._saved_versions = dict(self._versions)
+        if self._next_ids_due:
+            self._save_next_ids()
+
+    def _save_next_ids(self):
+        # The high-water marks only matter once an id above the saved mark is
+        # deleted (seeding from max(id) + 1 would hand it out again); creates
+        # alone leave their id in the rows, so they cost no meta write.
+        update_meta = getattr(self.st, "update_meta", None)
+        if update_meta and self._next_ids != self._saved_next_ids:
+            update_meta({"next_id": dict(self._next_ids)})
+            self._saved_next_ids = dict(self._next_ids)
+        self._next_ids_due = False
 
+    @synchronized
     def save_all(self):
+        # no-op when nothing changed since the last save
         self._maybe_save()
         return {
             "clients": len(self.clients),
@@ -90,6 +557,98 @@ class RMS:
             "flights": len(self.flights),
         }
 
+    @contextmanager
+    def transaction(self):
+        """
+        `with rms.transaction():` groups many create/update/delete calls.
+        Each call still validates before it changes anything, but nothing is
+        persisted until the block ends: then each dirty table is written once
+        (one apply() for row-level storage) and the buffered change events
+        are published. An exception undoes every change made in the block
+        and re-raises; nested blocks act as savepoints. Holds the lock
+        throughout, so other threads see the batch all at once or not at all.
+        """
+        with self.lock:
+            outer = not self._tx_depth
+            if outer:
+                self._undo, self._events = [], []
+                clean = [t for t in TABLES if t not in self.dirty_tables()]
+            marks = (len(self._undo), len(self._events), len(self._changes))
+            self._tx_depth += 1
+            committing = False
+            try:
+                yield self
+                if outer:
+                    self._tx_depth = 0
+                    committing = True
+                    self._maybe_save()
+            except BaseException:
+                touched = {(c["table"], c["key"]) for c in self._changes[marks[2] :]}
+                self._rollback(*marks)
+                if committing:
+                    # part of the block may be on disk already: log the undone
+                    # state of every touched row so the next save overwrites it
+                    for table, key in touched:
+                        row = self._get(table, key)
+                        if row is None:
+                            self._log_change(table, "delete", key)
+                        else:
+                            self._log_change(table, "put", key, row)
+                elif outer:
+                    # undone tables match storage again
+                    for t in clean:
+                        self._saved_versions[t] = self._versions[t]
+                raise
+            finally:
+                if outer:
+                    self._tx_depth = 0
+                    events, self._undo, self._events = self._events, None, None
+                else:
+                    self._tx_depth -= 1
+            if outer:
+                for ev in events:
+                    self._emit(*ev)
+
+    batch = transaction
+
+    def _rollback(self, undo_mark: int, event_mark: int, change_mark: int):
+        undo, self._undo = self._undo, None  # undo steps are not recorded
+        restored = False
+        try:
+            while len(undo) > undo_mark:
+                op, table, arg = undo.pop()
+                if op == "insert":
+                    self._delete_rows(table, [arg])
+                elif op == "replace":
+                    self._replace_row(table, arg)
+                else:
+                    for idx, row in arg:
+                        self._restore_row(table, idx, row)
+                    restored = restored or table == "flights"
+        finally:
+            self._undo = undo
+            if restored:
+                # restored flights were re-added at the view's end; put the
+                # view back in table order
+                view = self._flight_view
+                self._flight_view = {f["ID"]: view[f["ID"]] for f in self.flights}
+        del self._events[event_mark:]
+        del self._changes[change_mark:]
+
+    def sync(self, timeout: Optional[float] = None):
+        """Block until the last save is durable under the storage's mode."""
+        commit = self._commit
+        if commit is not None:
+            commit.result(timeout)
+
+    def close(self):
+        with self.lock:
+            self._save_next_ids()
+        # let storage finish background work (e.g. journal compaction)
+        close = getattr(self.st, "close", None)
+        if close:
+            close()
+
     # ----------list citys ----------
     def list_cities(self) -> List[str]:
         return CITY_CATALOG
@@ -113,15 +672,29 @@ class RMS:
         mapping = CITY_TO_STATE.get(country, {})
         return [c for c, st in mapping.items() if st == state]
 
+    def _combo_labels(self, table: str) -> List[str]:
+        # cached and kept in step with the table (see the row primitives);
+        # callers compare version(table) to skip re-applying an unchanged list
+        labels = self._combo.get(table)
+        if labels is None:
+            label = COMBO_LABELS[table]
+            labels = self._combo[table] = [label(r) for r in getattr(self, table)]
+        return labels
+
     def list_clients_combo(self) -> List[str]:
-        # "client_id - Name (Phone)"
-        return [
-            f'{c["client_id"]} - {c.get("Name","")} ({c.get("Phone","")})'
-            for c in self.clients
-        ]
+        # shared cached list: do not mutate
+        return self._combo_labels("clients")
 
     def list_airlines_combo(self) -> List[str]:
-        return [f'{a["airline_id"]} - {a.get("CompanyName","")}' for a in self.airlines]
+        return self._combo_labels("airlines")
+
+    def suggest_airlines(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Airlines whose CompanyName starts with `prefix`, alphabetical, at most
+        `limit` of them.
+        """
+        by_id = self._by_id["airlines"]
+        return [by_id[aid] for aid in self._airline_names.prefix(prefix, limit)]
 
     # =========== Client check and CRUD ===========
     def _validate_client_required(self, data: Dict):
@@ -204,58 +777,71 @@ class RMS:
         clean["Type"] = "client"
         return clean
 
+    @synchronized
     def create_client(self, data: Dict) -> Dict:
         clean = self._clean_and_validate_client(data)
-        new_id = self._next_id(self.clients, "client_id")
+        new_id = self._alloc_id("clients")
         c = Client(
             client_id=new_id, **{k: v for k, v in clean.items() if k != "client_id"}
         )
         row = c.to_dict()
-        self.clients.append(row)
+        self._insert_row("clients", row)
         self._maybe_save()
         log.info("Create client: %s", row)
         return row
 
+    @synchronized
     def update_client(self, client_id: int, patch: Dict) -> Dict:
-        idx, row = self._index_of(self.clients, "client_id", client_id)
+        row = self.get_client(client_id)
         if row is None:
             raise KeyError(f"Client {client_id} not found")
+        client_id = row["client_id"]
         merged = {**row, **patch, "client_id": client_id}
         clean = self._clean_and_validate_client(merged)
         # id & type
         clean["client_id"] = client_id
         clean["Type"] = "client"
-        self.clients[idx] = clean
+        self._replace_row("clients", clean)
         self._maybe_save()
         log.info("Update client %s -> %s", client_id, clean)
         return clean
 
+    @synchronized
     def delete_client(self, client_id: int):
-        idx, row = self._index_of(self.clients, "client_id", client_id)
+        row = self.get_client(client_id)
         if row is None:
             raise KeyError(f"Client {client_id} not found")
+        cid = row["client_id"]
+        self._delete_rows("clients", [cid])
         # delete flight
-        self.clients.pop(idx)
-        self.flights = [
-            f for f in self.flights if int(f.get("client_id", 0)) != int(client_id)
-        ]
+        self._delete_rows("flights", list(self._flights_by_client.get(cid, ())))
         self._maybe_save()
         log.info("Delete client %s", client_id)
 
+    def _match_clients(self, q: str) -> List[int]:
+        """Client ids matching q by exact id or Name/Phone substring, id order."""
+        return sorted(self._match_client_snapshot(q, self._client_snapshot(q)))
+
+    def _client_snapshot(self, q: str) -> tuple:
+        # under self.lock: candidate texts + the exact-id hit, if any
+        exact = int(q) if q.isdigit() and int(q) in self._by_id["clients"] else None
+        return self._client_text.candidates(q), exact
+
+    @staticmethod
+    def _match_client_snapshot(q: str, snap: tuple) -> Set[int]:
+        # needs no lock: works only on the snapshot
+        texts, exact = snap
+        ids = NgramIndex.matches(q, texts)
+        if exact is not None:
+            ids.add(exact)
+        return ids
+
     def search_clients(self, q: str) -> List[Dict]:
         q = (q or "").strip().lower()
         if not q:
             return []
-        out: List[Dict] = []
-        for r in self.clients:
-            if q.isdigit() and int(q) == int(r.get("client_id", 0)):
-                out.append(r)
-                continue
-            if (
-                q in str(r.get("Phone", "")).lower()
-                or q in str(r.get("Name", "")).lower()
-            ):
-                out.append(r)
+        by_id = self._by_id["clients"]
+        out: List[Dict] = [by_id[cid] for cid in self._match_clients(q)]
         log.info("Search clients q=%s -> %d", q, len(out))
         return out
 
@@ -267,60 +853,68 @@ class RMS:
         clean["Type"] = "airline"
         return clean
 
+    @synchronized
     def create_airline(self, data: Dict) -> Dict:
         clean = self._clean_and_validate_airline(data)
-        new_id = self._next_id(self.airlines, "airline_id")
+        new_id = self._alloc_id("airlines")
         a = Airline(
             airline_id=new_id, **{k: v for k, v in clean.items() if k != "airline_id"}
         )
         row = a.to_dict()
-        self.airlines.append(row)
+        self._insert_row("airlines", row)
         self._maybe_save()
         log.info("Create airline: %s", row)
         return row
 
+    @synchronized
     def update_airline(self, airline_id: int, patch: Dict) -> Dict:
-        idx, row = self._index_of(self.airlines, "airline_id", airline_id)
+        row = self.get_airline(airline_id)
         if row is None:
             raise KeyError(f"Airline {airline_id} not found")
+        airline_id = row["airline_id"]
         merged = {**row, **patch, "airline_id": airline_id}
         clean = self._clean_and_validate_airline(merged)
         clean["airline_id"] = airline_id
-        self.airlines[idx] = clean
+        self._replace_row("airlines", clean)
         self._maybe_save()
         log.info("Update airline %s -> %s", airline_id, clean)
         return clean
 
+    @synchronized
     def delete_airline(self, airline_id: int):
-        idx, row = self._index_of(self.airlines, "airline_id", airline_id)
+        row = self.get_airline(airline_id)
         if row is None:
             raise KeyError(f"Airline {airline_id} not found")
-        self.airlines.pop(idx)
-        self.flights = [
-            f for f in self.flights if int(f.get("airline_id", 0)) != int(airline_id)
-        ]
+        aid = row["airline_id"]
+        self._delete_rows("airlines", [aid])
+        self._delete_rows("flights", list(self._flights_by_airline.get(aid, ())))
         self._maybe_save()
         log.info("Delete airline %s", airline_id)
 
+    def _match_airlines(self, q: str) -> List[int]:
+        out: List[int] = []
+        for r in self.airlines:
+            if q.isdigit() and int(q) == r.get("airline_id"):
+                out.append(r["airline_id"])
+                continue
+            if q in str(r.get("CompanyName", "")).lower():
+                out.append(r["airline_id"])
+        return out
+
     def search_airlines(self, q: str) -> List[Dict]:
         q = (q or "").strip().lower()
         if not q:
             return []
-        out: List[Dict] = []
-        for r in self.airlines:
-            if q.isdigit() and int(q) == int(r.get("airline_id", 0)):
-                out.append(r)
-                continue
-            if q in str(r.get("CompanyName", "")).lower():
-                out.append(r)
+        by_id = self._by_id["airlines"]
+        out: List[Dict] = [by_id[aid] for aid in self._match_airlines(q)]
         log.info("Search airlines q=%s -> %d", q, len(out))
         return out
 
     # =========== Flight check and CRUD ===========
     def _check_fk(self, client_id: int, airline_id: int):
-        if not self._find(self.clients, "client_id", client_id):
+        if not self.get_client(client_id):
             raise ValueError(f"client_id {client_id} not found")
-        if not self._find(self.airlines, "airline_id", airline_id):
+        if not self.get_airline(airline_id):
             raise ValueError(f"airline_id {airline_id} not found")
 
     def _clean_and_validate_flight(self, data: Dict) -> Dict:
@@ -359,90 +953,345 @@ class RMS:
         clean["Type"] = "flight"
         return clean
 
+    @synchronized
     def create_flight(self, data: Dict) -> Dict:
         clean = self._clean_and_validate_flight(data)
-        new_id = self._next_id(self.flights, "ID")
+        new_id = self._alloc_id("flights")
         f = Flight(ID=new_id, **{k: v for k, v in clean.items() if k != "ID"})
         row = f.to_dict()
-        self.flights.append(row)
+        self._insert_row("flights", row)
         self._maybe_save()
         log.info("Create flight: %s", row)
         return row
 
+    @synchronized
     def update_flight(self, flight_id: int, patch: Dict) -> Dict:
-        idx, row = self._index_of(self.flights, "ID", flight_id)
+        row = self.get_flight(flight_id)
         if row is None:
             raise KeyError(f"Flight {flight_id} not found")
+        flight_id = row["ID"]
         merged = {**row, **patch, "ID": flight_id}
         clean = self._clean_and_validate_flight(merged)
         clean["ID"] = flight_id
-        self.flights[idx] = clean
+        self._replace_row("flights", clean)
         self._maybe_save()
         log.info("Update flight %s -> %s", flight_id, clean)
         return clean
 
+    @synchronized
     def delete_flight(self, flight_id: int):
-        idx, row = self._index_of(self.flights, "ID", flight_id)
+        row = self.get_flight(flight_id)
         if row is None:
             raise KeyError(f"Flight {flight_id} not found")
-        self.flights.pop(idx)
+        self._delete_rows("flights", [row["ID"]])
         self._maybe_save()
         log.info("Delete flight %s", flight_id)
 
     # ---------- check flights ----------
+    def _enrich(self, f: dict) -> Dict:
+        enr = dict(f)
+        c = self.get_client(f.get("client_id")) or {}
+        a = self.get_airline(f.get("airline_id")) or {}
+        enr["ClientName"] = c.get("Name", "")
+        enr["Phone"] = c.get("Phone", "")
+        enr["Airline"] = a.get("CompanyName", "")
+        return enr
+
+    def _flights_by_ids(self, fids: Iterable[int]) -> List[Dict]:
+        # ids are allocated ascending, so id order is creation order
+        view = self._flight_view
+        return [view[fid] for fid in sorted(fids)]
+
+    def get_flight_enriched(self, flight_id: int) -> Optional[Dict]:
+        """One flight with ClientName/Phone/Airline, from the maintained view."""
+        return self._flight_view.get(int(flight_id))
+
+    def list_flights_enriched(self) -> List[Dict]:
+        """All flights with ClientName/Phone/Airline, from the maintained view."""
+        return list(self._flight_view.values())
+
     def search_flights_by_client(self, client_id: int) -> List[Dict]:
-        out: List[Dict] = []
-        for f in self.flights:
-            if int(f.get("client_id", 0)) != int(client_id):
-                continue
-            enr = dict(f)
-            c = self._find(self.clients, "client_id", int(f["client_id"])) or {}
-            a = self._find(self.airlines, "airline_id", int(f["airline_id"])) or {}
-            enr["ClientName"] = c.get("Name", "")
-            enr["Phone"] = c.get("Phone", "")
-            enr["Airline"] = a.get("CompanyName", "")
-            out.append(enr)
-        return out
+        return self._flights_by_ids(self._flights_by_client.get(int(client_id), ()))
 
     def search_flights(self, q: str) -> List[Dict]:
         q = (q or "").strip().lower()
         if not q:
             return []
-        # match client
-        matched = []
-        for c in self.clients:
-            if q.isdigit() and int(q) == int(c.get("client_id", 0)):
-                matched.append(c)
-                continue
-            if q in c.get("Name", "").lower() or q in c.get("Phone", "").lower():
-                matched.append(c)
-        ids = {int(c["client_id"]) for c in matched}
-
-        out: List[Dict] = []
-        for f in self.flights:
-            if int(f.get("client_id", 0)) not in ids:
-                continue
-            enr = dict(f)
-            a = self._find(self.airlines, "airline_id", int(f["airline_id"])) or {}
-            c = self._find(self.clients, "client_id", int(f["client_id"])) or {}
-            enr["ClientName"] = c.get("Name", "")
-            enr["Phone"] = c.get("Phone", "")
-            enr["Airline"] = a.get("CompanyName", "")
-            out.append(enr)
+        out = self._flights_by_ids(self._match_flights(q))
         log.info("Search flights q=%s -> %d", q, len(out))
         return out
 
+    def _match_flights(self, q: str) -> Set[int]:
+        # match client
+        return self._flights_of_clients(self._match_clients(q))
+
+    def _flights_of_clients(self, cids: Iterable[int]) -> Set[int]:
+        fids: Set[int] = set()
+        for cid in cids:
+            fids.update(self._flights_by_client.get(cid, ()))
+        return fids
+
     def search_flights_by_fk(self, client_id: int, airline_id: int) -> List[Dict]:
-        out: List[Dict] = []
-        for f in self.flights:
-            if int(f.get("client_id", 0)) == int(client_id) and int(
-                f.get("airline_id", 0)
-            ) == int(airline_id):
-                enr = dict(f)
-                a = self._find(self.airlines, "airline_id", int(f["airline_id"])) or {}
-                c = self._find(self.clients, "client_id", int(f["client_id"])) or {}
-                enr["ClientName"] = c.get("Name", "")
-                enr["Phone"] = c.get("Phone", "")
-                enr["Airline"] = a.get("CompanyName", "")
-                out.append(enr)
-        return out
+        pair = (int(client_id), int(airline_id))
+        return self._flights_by_ids(self._flights_by_pair.get(pair, ()))
+
+    def search_flights_by_route(self, start_city: str, end_city: str) -> List[Dict]:
+        """Flights from start_city to end_city (city names match case-insensitively)."""
+        route = (city_key(start_city), city_key(end_city))
+        return self._flights_by_ids(self._flights_by_route.get(route, ()))
+
+    def flights_touching_city(self, city: str) -> List[Dict]:
+        """Flights departing from or arriving at `city`."""
+        return self._flights_by_ids(self._flights_by_city.get(city_key(city), ()))
+
+    def flights_between(self, start, end) -> List[Dict]:
+        """Flights departing in [start, end), in departure order.
+        Bounds are datetimes or "YYYY-MM-DD HH:MM" strings; None means open.
+        """
+        lo, hi = self._time_bound(start), self._time_bound(end)
+        view = self._flight_view
+        return [view[fid] for fid in self._flights_by_time.range(lo, hi)]
+
+    def upcoming_flights(self, n: int = 10, now=None) -> List[Dict]:
+        """The next n flights departing at or after `now` (default: current time)."""
+        lo = self._time_bound(now) if now is not None else datetime.now()
+        view = self._flight_view
+        return [view[fid] for fid in self._flights_by_time.range(lo, None, limit=n)]
+
+    @staticmethod
+    def _time_bound(value) -> Optional[datetime]:
+        if value is None:
+            return None
+        when = flight_time(value)
+        if when is None:
+            raise ValueError("Date must be 'YYYY-MM-DD HH:MM'")
+        return when
+
+    # =========== Paged queries ===========
+    @staticmethod
+    def _sort_value(v: Any) -> Tuple[int, Any]:
+        # numbers before text; text compared case-insensitively
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            return (0, v)
+        return (1, "" if v is None else str(v).casefold())
+
+    @staticmethod
+    def _encode_cursor(entry: tuple) -> str:
+        raw = json.dumps([list(entry[0]), entry[1]]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        try:
+            (tag, v), key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return ((tag, v), key)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def _view_rows(self, table: str) -> Dict[int, dict]:
+        return self._flight_view if table == "flights" else self._by_id[table]
+
+    # flight view columns copied from the parent tables
+    VIEW_DEPS = {"ClientName": "clients", "Phone": "clients", "Airline": "airlines"}
+
+    def _stamp(self, table: str, sort_key: str, deps: Tuple[str, ...] = ()) -> tuple:
+        """Versions of the tables an ordering of `table` by sort_key reads."""
+        need = {table, *deps}
+        if table == "flights" and sort_key in self.VIEW_DEPS:
+            need.add(self.VIEW_DEPS[sort_key])
+        return tuple(self._versions[t] for t in TABLES if t in need)
+
+    def _sorted_entries(self, table: str, sort_key: str) -> list:
+        """All rows of `table` as sorted (sort value, id); cached per data version."""
+        if sort_key == TABLE_KEYS[table]:
+            return self._id_entries(table)
+        stamp = self._stamp(table, sort_key)
+        hit = self._sort_cache.get((table, sort_key))
+        if hit and hit[0] == stamp:
+            return hit[1]
+        rows, sv = self._view_rows(table), self._sort_value
+        entries = sorted((sv(r.get(sort_key)), k) for k, r in rows.items())
+        self._sort_cache[(table, sort_key)] = (stamp, entries)
+        return entries
+
+    RESULT_CACHE_SIZE = 8
+
+    def _filtered_entries(
+        self,
+        table: str,
+        sig: tuple,
+        match: Callable[[], Iterable[int]],
+        sort_key: str,
+        deps: Tuple[str, ...] = (),
+    ) -> list:
+        """Sorted (sort value, id) for the ids `match()` returns, cached by `sig`.
+        Paging through one result (e.g. a virtual list) then matches only once.
+        `deps`: other tables the match reads (e.g. clients for a flight search).
+        """
+        stamp = self._stamp(table, sort_key, deps)
+        ck = (table, sig, sort_key)
+        hit = self._result_cache.pop(ck, None)
+        if hit is None or hit[0] != stamp:
+            rows, sv = self._view_rows(table), self._sort_value
+            hit = (stamp, sorted((sv(rows[k].get(sort_key)), k) for k in match()))
+        self._result_cache[ck] = hit  # most recently used last
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            del self._result_cache[next(iter(self._result_cache))]
+        return hit[1]
+
+    def _page(
+        self,
+        table: str,
+        sig: Optional[tuple],
+        match: Optional[Callable[[], Iterable[int]]],
+        sort_key: str,
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        deps: Tuple[str, ...] = (),
+    ) -> Page:
+        # match=None: the whole table
+        if match is None:
+            entries = self._sorted_entries(table, sort_key)
+        else:
+            entries = self._filtered_entries(table, sig, match, sort_key, deps)
+        if cursor:
+            start = bisect_right(entries, self._decode_cursor(cursor))
+        else:
+            start = max(0, int(offset))
+        end = start + max(0, int(limit))
+        rows = self._view_rows(table)
+        page = [rows[k] for _, k in entries[start:end]]
+        has_more = end < len(entries)
+        nxt = self._encode_cursor(entries[end - 1]) if has_more and page else None
+        return Page(rows=page, total=len(entries), has_more=has_more, next_cursor=nxt)
+
+    def _query(
+        self,
+        table: str,
+        sig: tuple,
+        snapshot: Callable[[], Any],
+        match: Callable[[Any], Iterable[int]],
+        resolve: Callable[[Iterable[int]], Iterable[int]],
+        sort_key: str,
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        deps: Tuple[str, ...] = (),
+    ) -> Page:
+        """
+        _page() for a text query whose matching runs outside self.lock, so
+        a search on a worker thread doesn't stall writers or the UI:
+        snapshot() copies the candidates under the lock, match(snap) filters
+        them without it, and resolve(ids) maps the result to `table` ids
+        under the lock again. The match is kept only if none of the tables
+        it reads changed meanwhile; otherwise it is redone under the lock.
+        """
+        args = (sort_key, limit, offset, cursor, deps)
+
+        def locked():
+            return resolve(match(snapshot()))
+
+        with self.lock:
+            stamp = self._stamp(table, sort_key, deps)
+            hit = self._result_cache.get((table, sig, sort_key))
+            if hit is not None and hit[0] == stamp:
+                return self._page(table, sig, locked, *args)
+            snap = snapshot()
+        ids = match(snap)
+        with self.lock:
+            if self._stamp(table, sort_key, deps) == stamp:
+                return self._page(table, sig, lambda: resolve(ids), *args)
+            return self._page(table, sig, locked, *args)
+
+    def query_clients(
+        self,
+        q: str = "",
+        sort_key: str = "client_id",
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """
+        One page of clients (all, or matching q like search_clients).
+        Pass the returned next_cursor back to continue after the last row.
+        """
+        q = (q or "").strip().lower()
+        if not q:
+            with self.lock:
+                return self._page(
+                    "clients", (q,), None, sort_key, limit, offset, cursor
+                )
+        return self._query(
+            "clients",
+            (q,),
+            lambda: self._client_snapshot(q),
+            lambda snap: self._match_client_snapshot(q, snap),
+            sorted,
+            sort_key,
+            limit,
+            offset,
+            cursor,
+        )
+
+    @synchronized
+    def query_airlines(
+        self,
+        q: str = "",
+        sort_key: str = "airline_id",
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        q = (q or "").strip().lower()
+        match = (lambda: self._match_airlines(q)) if q else None
+        return self._page("airlines", (q,), match, sort_key, limit, offset, cursor)
+
+    def query_flights(
+        self,
+        q: str = "",
+        client_id: Optional[int] = None,
+        airline_id: Optional[int] = None,
+        sort_key: str = "ID",
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """
+        One page of enriched flights, optionally filtered by q (client
+        id/name/phone) and/or client_id / airline_id.
+        """
+        q = (q or "").strip().lower()
+        cid = None if client_id is None else int(client_id)
+        aid = None if airline_id is None else int(airline_id)
+
+        def _fk_filter(ids: Optional[Set[int]]) -> Optional[Set[int]]:
+            if cid is not None and aid is not None:
+                fk = self._flights_by_pair.get((cid, aid), set())
+            elif cid is not None:
+                fk = self._flights_by_client.get(cid, set())
+            elif aid is not None:
+                fk = self._flights_by_airline.get(aid, set())
+            else:
+                return ids
+            return set(fk) if ids is None else ids & fk
+
+        sig = (q, cid, aid)
+        if q:
+            # match clients outside the lock, then map them to their flights
+            return self._query(
+                "flights",
+                sig,
+                lambda: self._client_snapshot(q),
+                lambda snap: self._match_client_snapshot(q, snap),
+                lambda cids: _fk_filter(self._flights_of_clients(cids)),
+                sort_key,
+                limit,
+                offset,
+                cursor,
+                deps=("clients",),
+            )
+        filtered = cid is not None or aid is not None
+        match = (lambda: _fk_filter(None)) if filtered else None
+        with self.lock:
+            return self._page("flights", sig, match, sort_key, limit, offset, cursor)
@@ -0,0 +1,271 @@
+# sqlite_storage.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional
+
+from storage import DURABILITY_MODES, TABLE_KEYS, JsonlStorage, _data_root
+
+log = logging.getLogger(__name__)
+
+# indexed columns kept next to the JSON row (besides the primary key)
+INDEXED_COLUMNS = {
+    "clients": (),
+    "airlines": (),
+    "flights": ("client_id", "airline_id", "Date"),
+}
+
+# durability mode -> PRAGMA synchronous (in WAL mode NORMAL syncs at checkpoints)
+SYNCHRONOUS = {"none": "OFF", "batch": "NORMAL", "always": "FULL"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    client_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS airlines (
+    airline_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flights (
+    ID INTEGER PRIMARY KEY,
+    client_id INTEGER,
+    airline_id INTEGER,
+    Date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS flights_client ON flights (client_id);
+CREATE INDEX IF NOT EXISTS flights_airline ON flights (airline_id);
+CREATE INDEX IF NOT EXISTS flights_date ON flights (Date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SqliteStorage:
+    """
+    SQLite backend (stdlib sqlite3) for the Storage protocol.
+    - one table per record type; the row is stored as JSON next to its
+      primary key and, for flights, indexed client_id / airline_id / Date
+    - put / delete / apply are single transactions (row_level = True), so a
+      save writes only the changed rows
+    - get / scan(table, **filters) read through the indexes without loading
+      whole tables
+    - meta key/value table replaces meta.json
+    - durability none / batch / always maps to PRAGMA synchronous
+    - a new database takes over the JSONL tables in its directory once
+      (import_jsonl), so switching an existing install keeps its records
+    """
+
+    row_level = True
+    SCAN_BATCH = 1000
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        durability: str = "always",
+        import_jsonl: bool = True,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        if path is None:
+            # same directory rules as JsonlStorage (never the app bundle)
+            path = os.path.join(_data_root(), "rms.sqlite3")
+        self.path = path
+        # shared by the Tk thread and the loader / search threads
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[durability]}")
+        self.durability = durability
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        log.info("SqliteStorage: %s", path)
+        if import_jsonl:
+            self._import_jsonl_once(os.path.dirname(os.path.abspath(path)))
+
+    def _import_jsonl_once(self, root: str):
+        # The first open of a database decides: if it is empty and JsonlStorage
+        # files sit next to it, copy them in (snapshot + journal, migrated).
+        # The marker keeps a later, emptied database from importing them again.
+        with self._lock:
+            if self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'jsonl_import'"
+            ).fetchone():
+                return
+            empty = not any(
+                self._conn.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone()
+                for t in TABLE_KEYS
+            )
+        names = [f"{t}.jsonl" for t in TABLE_KEYS]
+        names += [f"{t}.journal.jsonl" for t in TABLE_KEYS]
+        data: Dict[str, List[dict]] = {}
+        next_ids = None
+        if empty and any(os.path.exists(os.path.join(root, n)) for n in names):
+            src = JsonlStorage(root=root, journal=True)
+            try:
+                data = {t: src.load_table(t) for t in TABLE_KEYS}
+                next_ids = src.read_meta().get("next_id")
+            finally:
+                src.close()
+        with self._lock, self._conn:
+            for table, rows in data.items():
+                self._conn.executemany(
+                    self._upsert_sql(table), self._values(table, rows)
+                )
+            meta = {"jsonl_import": root if data else None}
+            if next_ids:
+                meta["next_id"] = next_ids
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()],
+            )
+        if data:
+            log.info(
+                "Imported JSONL tables from %s: %s",
+                root,
+                {t: len(rows) for t, rows in data.items()},
+            )
+
+    # --------------------- Rows ---------------------
+    def _columns(self, table: str, row: dict) -> tuple:
+        vals = [int(row[TABLE_KEYS[table]])]
+        vals += [row.get(c) for c in INDEXED_COLUMNS[table]]
+        vals.append(json.dumps(row, ensure_ascii=False))
+        return tuple(vals)
+
+    def _upsert_sql(self, table: str) -> str:
+        cols = (TABLE_KEYS[table], *INDEXED_COLUMNS[table], "data")
+        marks = ", ".join("?" for _ in cols)
+        return f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}) VALUES ({marks})"
+
+    def get(self, table: str, key) -> Optional[dict]:
+        sql = f"SELECT data FROM {table} WHERE {TABLE_KEYS[table]} = ?"
+        with self._lock:
+            hit = self._conn.execute(sql, (int(key),)).fetchone()
+        return json.loads(hit[0]) if hit else None
+
+    def scan(self, table: str, **filters) -> Iterator[dict]:
+        """
+        Rows in primary-key order, fetched in keyset batches (constant memory).
+        filters: equality on the primary key or indexed columns.
+        """
+        pk = TABLE_KEYS[table]
+        bad = set(filters) - {pk, *INDEXED_COLUMNS[table]}
+        if bad:
+            raise ValueError(f"Cannot filter {table} by {sorted(bad)}")
+        where = "".join(f" AND {c} = ?" for c in filters)
+        sql = (
+            f"SELECT {pk}, data FROM {table} WHERE {pk} > ?{where}"
+            f" ORDER BY {pk} LIMIT {self.SCAN_BATCH}"
+        )
+        last = -(2**63)
+        while True:
+            with self._lock:
+                batch = self._conn.execute(sql, (last, *filters.values())).fetchall()
+            for _, data in batch:
+                yield json.loads(data)
+            if len(batch) < self.SCAN_BATCH:
+                return
+            last = batch[-1][0]
+
+    def flights_between(self, start: str, end: str) -> List[dict]:
+        """Flights with start <= Date < end ("YYYY-MM-DD HH:MM"), via the Date index."""
+        sql = "SELECT data FROM flights WHERE Date >= ? AND Date < ? ORDER BY Date, ID"
+        with self._lock:
+            rows = self._conn.execute(sql, (start, end)).fetchall()
+        return [json.loads(d) for (d,) in rows]
+
+    def put(self, table: str, row: dict):
+        key = row[TABLE_KEYS[table]]
+        return self.apply([{"op": "put", "table": table, "key": key, "row": row}])
+
+    def delete(self, table: str, key):
+        return self.apply([{"op": "delete", "table": table, "key": key}])
+
+    def apply(self, entries: List[dict]) -> Future:
+        """Apply put/delete change entries in one transaction."""
+        with self._lock, self._conn:
+            for e in entries:
+                table = e["table"]
+                if e.get("op") == "put":
+                    self._conn.execute(
+                        self._upsert_sql(table), self._columns(table, e["row"])
+                    )
+                elif e.get("op") == "delete":
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE {TABLE_KEYS[table]} = ?",
+                        (int(e["key"]),),
+                    )
+                else:
+                    log.warning("Bad change entry: %s", e)
+        done: Future = Future()
+        done.set_result(None)  # committed under the connection's synchronous mode
+        return done
+
+    # --------------------- Whole tables ---------------------
+    def load_all(self) -> Dict[str, List[dict]]:
+        out = {t: list(self.scan(t)) for t in TABLE_KEYS}
+        log.info(
+            "Loaded: clients=%d airlines=%d flights=%d",
+            len(out["clients"]),
+            len(out["airlines"]),
+            len(out["flights"]),
+        )
+        return out
+
+    def _values(self, table: str, rows: List[dict]) -> List[tuple]:
+        values = []
+        for r in rows:
+            try:
+                values.append(self._columns(table, r))
+            except (KeyError, TypeError, ValueError):
+                log.warning("Skip %s row without a valid key: %s", table, r)
+        return values
+
+    def _write_table(self, table: str, rows: List[dict]):
+        values = self._values(table, rows)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(self._upsert_sql(table), values)
+
+    def write_clients(self, rows: List[dict]):
+        self._write_table("clients", rows)
+
+    def write_airlines(self, rows: List[dict]):
+        self._write_table("airlines", rows)
+
+    def write_flights(self, rows: List[dict]):
+        self._write_table("flights", rows)
+
+    # --------------------- Metadata ---------------------
+    def read_meta(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM meta").fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def update_meta(self, patch: dict):
+        """Merge `patch` into meta, nested dicts one level deep (as JsonlStorage)."""
+        with self._lock, self._conn:
+            values = []
+            for k, v in patch.items():
+                if isinstance(v, dict):
+                    hit = self._conn.execute(
+                        "SELECT value FROM meta WHERE key = ?", (k,)
+                    ).fetchone()
+                    old = json.loads(hit[0]) if hit else None
+                    if isinstance(old, dict):
+                        v = {**old, **v}
+                values.append((k, json.dumps(v, ensure_ascii=False)))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
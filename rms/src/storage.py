@@ -2,15 +2,41 @@
 import io
 import json
 import logging
+import mmap
 import os
 import shutil
+import struct
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+import columnar
 
 log = logging.getLogger(__name__)
 
+# table name -> primary key field
+TABLE_KEYS = {"clients": "client_id", "airlines": "airline_id", "flights": "ID"}
+# "Type" field of each table's rows
+ROW_TYPES = {"clients": "client", "airlines": "airline", "flights": "flight"}
+
+# on-disk row schema; 1 = legacy ID / Client_ID / Airline_ID fields
+SCHEMA_VERSION = 2
+
+# fsync policy: none = OS buffers only; batch = journal appends within a short
+# window share one fsync (group commit); always = fsync on every append
+DURABILITY_MODES = ("none", "batch", "always")
+
+# <table>.jsonl.idx sidecar: header (magic, snapshot size, mtime_ns, count)
+# then fixed-width (key, byte offset, byte length) records sorted by key
+INDEX_SUFFIX = ".idx"
+INDEX_HEADER = struct.Struct("<8sQQQ")
+INDEX_RECORD = struct.Struct("<qQI")
+INDEX_MAGIC = b"RMSIDX01"
+
 
 def _default_data_dir() -> str:
     """
@@ -62,6 +88,65 @@ def _dev_project_data_dir(max_up: int = 5) -> Optional[str]:
     return None
 
 
+def _data_root(root: Optional[str] = None) -> str:
+    """Data directory shared by the storage backends (created if missing)."""
+    # Priority order: explicit root > (not frozen and project data/ exists) > user-level directory.
+    if root:
+        root = str(Path(root).expanduser().resolve())
+        log.info("Storage root (explicit): %s", root)
+    elif getattr(sys, "frozen", False):
+        # Packaged mode: always write to the user-level directory.
+        root = _default_data_dir()
+    else:
+        # Source mode: if the project’s data/ is found, use it; otherwise use the user-level directory.
+        root = _dev_project_data_dir() or _default_data_dir()
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+class Storage(Protocol):
+    """
+    Storage contract used by RMS. Backends: JsonlStorage, SqliteStorage.
+    - load_all(): every table as lists of row dicts
+    - get / put / delete / scan: row-level access by table name + primary key
+    - apply(entries): a batch of {"op": "put"|"delete", "table", "key", "row"}
+      change entries; backends with row_level = True make this cheap, so RMS
+      hands them its change log instead of rewriting whole tables. Returns a
+      Future that completes once the entries are durable.
+    - write_<table>(rows): replace a whole table
+    """
+
+    row_level: bool
+
+    def load_all(self) -> Dict[str, List[dict]]: ...
+
+    def get(self, table: str, key) -> Optional[dict]: ...
+
+    def put(self, table: str, row: dict) -> Future: ...
+
+    def delete(self, table: str, key) -> Future: ...
+
+    def scan(self, table: str) -> Iterator[dict]: ...
+
+    def apply(self, entries: List[dict]) -> Future: ...
+
+    def write_clients(self, rows: List[dict]): ...
+
+    def write_airlines(self, rows: List[dict]): ...
+
+    def write_flights(self, rows: List[dict]): ...
+
+
+def _norm_key(v) -> Optional[object]:
+    """Primary keys may be stored as int or numeric string; compare them as int."""
+    if v is None:
+        return None
+    try:
+        return int(v)
+    except Exception:
+        return v
+
+
 class JsonlStorage:
     """
     Simple JSONL saving. Provides:
@@ -72,27 +157,94 @@ class JsonlStorage:
         clients: ID -> client_id
         airlines: ID -> airline_id
         flights: Client_ID/Airline_ID -> client_id/airline_id; generates missing IDs if absent
+      (per table, streamed old file -> temp file; a schema stamp in meta.json
+      lets already-migrated files skip the scan on later starts)
+    - Optional journaled mode: row changes are appended to <table>.journal.jsonl
+      and replayed on top of the snapshot by load_all()
+    - Background compaction folds a journal into a fresh snapshot once it grows
+      past `compact_bytes` or `compact_ratio` x snapshot rows
+    - meta.json sidecar for small bookkeeping (e.g. id high-water marks)
+    - Optional columnar mode: <table>.cols keeps a binary column-wise copy of
+      the snapshot (interned string pool, int64 id arrays, crc32) that
+      load_all() prefers while it matches the JSONL; JSONL stays the source
+    - Durability modes none / batch / always: with batch, appends arriving
+      within `commit_window_ms` are made durable by one shared fsync, and
+      append_journal() / apply() return a Future to wait on
+    - <table>.jsonl.idx offset index (key -> byte offset/length), written with
+      each snapshot, so get() decodes one row from an mmap of the file
     """
 
-    def __init__(self, root: Optional[str] = None):
-        # Priority order: explicit root > (not frozen and project data/ exists) > user-level directory.
-        if root:
-            self.root = str(Path(root).expanduser().resolve())
-            log.info("JsonlStorage root (explicit): %s", self.root)
-        else:
-            if getattr(sys, "frozen", False):
-                # Packaged mode: always write to the user-level directory.
-                self.root = _default_data_dir()
-            else:
-                # Source mode: if the project’s data/ is found, use it; otherwise use the user-level directory.
-                dev = _dev_project_data_dir()
-                self.root = dev if dev else _default_data_dir()
-
-        os.makedirs(self.root, exist_ok=True)
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        journal: bool = False,
+        compact_bytes: int = 4 * 1024 * 1024,
+        compact_ratio: float = 0.5,
+        compact_min_entries: int = 1000,
+        columnar: bool = False,
+        durability: str = "none",
+        commit_window_ms: int = 5,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.root = _data_root(root)
 
         self.clients_path = os.path.join(self.root, "clients.jsonl")
         self.airlines_path = os.path.join(self.root, "airlines.jsonl")
         self.flights_path = os.path.join(self.root, "flights.jsonl")
+        self.meta_path = os.path.join(self.root, "meta.json")
+        self._meta: Optional[dict] = None
+        self._meta_lock = threading.Lock()
+        self.paths = {
+            "clients": self.clients_path,
+            "airlines": self.airlines_path,
+            "flights": self.flights_path,
+        }
+
+        # Journaled mode: one append-only log per table, folded into the snapshot
+        # whenever the whole table is written again.
+        self.journal = journal
+        self.journal_paths = {
+            t: os.path.join(self.root, f"{t}.journal.jsonl") for t in TABLE_KEYS
+        }
+
+        # Durability: snapshots and meta are fsynced unless "none"; journal
+        # appends follow the mode, "batch" through the group-commit thread
+        self.durability = durability
+        self.commit_window = commit_window_ms / 1000
+        self._commit_cond = threading.Condition()
+        self._commit_waiters: List[Future] = []
+        # dup'ed descriptors of the journal files written since the last commit
+        self._commit_fds: List[int] = []
+        self._commit_dir = False
+        # appends queued so far / made durable so far (sync() waits for these
+        # to meet) and the error of the last failed batch
+        self._commit_seq = 0
+        self._commit_done = 0
+        self._commit_error: Optional[BaseException] = None
+        self._committer: Optional[threading.Thread] = None
+        self._closing = False
+
+        # Optional binary column-wise copy of each snapshot, for fast cold start
+        self.columnar = columnar
+        self.columnar_paths = {
+            t: os.path.join(self.root, f"{t}.cols") for t in TABLE_KEYS
+        }
+
+        # Compaction thresholds and bookkeeping
+        self.compact_bytes = compact_bytes
+        self.compact_ratio = compact_ratio
+        self.compact_min_entries = compact_min_entries
+        self._journal_entries = {t: 0 for t in TABLE_KEYS}
+        self._journal_bytes = {t: 0 for t in TABLE_KEYS}
+        self._snapshot_rows = {t: 0 for t in TABLE_KEYS}
+        # _lock: journal appends/rotation; table locks: snapshot replacement
+        self._lock = threading.Lock()
+        self._table_locks = {t: threading.Lock() for t in TABLE_KEYS}
+        self._compactor: Optional[threading.Thread] = None
+        # get(): snapshot path -> (sig, data mmap, index mmap, count); journals
+        self._maps: Dict[str, tuple] = {}
+        self._overlays: Dict[str, tuple] = {}
 
         # First run: If the user's directory doesn't contain the file, attempt to copy the template from the packaged resource folder data/ (if available).
         self._seed_from_bundle_if_empty()
@@ -128,79 +280,806 @@ class JsonlStorage:
                 log.info("Seeded %s from bundle", name)
 
     # --------------------- Basic I/O ---------------------
-    def _read_jsonl(self, path: str) -> List[dict]:
+    def _iter_jsonl(self, path: str) -> Iterator[dict]:
+        """Yield one parsed row per line; memory is one line at a time."""
         if not os.path.exists(path):
-            return []
-        out: List[dict] = []
+            return
         with io.open(path, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()
                 if not line:
                     continue
                 try:
-                    out.append(json.loads(line))
+                    yield json.loads(line)
                 except Exception as e:
                     log.warning("Bad jsonl line in %s: %s", path, e)
-        return out
 
-    def _write_jsonl_atomic(self, path: str, rows: List[dict]):
+    def _read_jsonl(self, path: str) -> List[dict]:
+        return list(self._iter_jsonl(path))
+
+    def _read_jsonl_bulk(self, path: str) -> List[dict]:
+        """
+        Lean whole-file parse for current-schema snapshots: one json.loads over
+        the joined lines. Falls back to the line reader if any line is bad.
+        """
+        if not os.path.exists(path):
+            return []
+        with io.open(path, "r", encoding="utf-8") as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        try:
+            rows = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:
+            return self._read_jsonl(path)
+        if all(isinstance(r, dict) for r in rows):
+            return rows
+        return [r for r in rows if isinstance(r, dict)]
+
+    def _write_jsonl_atomic(
+        self, path: str, rows: Iterable[dict], index_key: Optional[str] = None
+    ) -> int:
+        """
+        Write rows to a temp file and os.replace it over `path`. With
+        `index_key`, the offset index sidecar is written from the same pass.
+        """
         tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
-        with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
-            for r in rows:
-                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        n = off = 0
+        entries: List[Tuple[int, int, int]] = []
+        try:
+            # binary, so offsets are exact bytes (no newline translation)
+            with os.fdopen(tmp_fd, "wb") as f:
+                for r in rows:
+                    line = (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    if index_key is not None:
+                        try:
+                            entries.append((int(r[index_key]), off, len(line)))
+                        except (KeyError, TypeError, ValueError):
+                            pass
+                    off += len(line)
+                    n += 1
+                self._fsync(f)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._close_map(path)
         os.replace(tmp_path, path)
+        self._fsync_dir()
+        if index_key is not None:
+            self._write_offset_index(path, entries)
+        return n
 
-    # --------------------- Read + Move ---------------------
-    def load_all(self) -> Dict[str, List[dict]]:
-        clients = self._read_jsonl(self.clients_path)
-        airlines = self._read_jsonl(self.airlines_path)
-        flights = self._read_jsonl(self.flights_path)
-
-        migrated = False
-
-        # clients: ID -> client_id
-        for c in clients:
-            if "client_id" not in c and "ID" in c:
-                c["client_id"] = c.pop("ID")
-                migrated = True
-            c.setdefault("Type", "client")
-
-        # airlines: ID -> airline_id
-        for a in airlines:
-            if "airline_id" not in a and "ID" in a:
-                a["airline_id"] = a.pop("ID")
-                migrated = True
-            a.setdefault("Type", "airline")
-
-        # flights: Client_ID/Airline_ID -> client_id/airline_id；If No Id, then Fill it
-        next_fid = 1
-        for f in flights:
-            if "Client_ID" in f and "client_id" not in f:
-                f["client_id"] = f.pop("Client_ID")
-                migrated = True
-            if "Airline_ID" in f and "airline_id" not in f:
-                f["airline_id"] = f.pop("Airline_ID")
-                migrated = True
-            f.setdefault("Type", "flight")
-            if "ID" in f:
+    # --------------------- Offset index + mmap reads ---------------------
+    def _write_offset_index(self, path: str, entries: List[Tuple[int, int, int]]):
+        """Write the sidecar for `path`, stamped with the snapshot size + mtime."""
+        entries.sort()
+        recs, last = [], None
+        for k, off, n in entries:
+            if k == last:
+                continue  # duplicate key: the first row wins, as in a scan
+            last = k
+            try:
+                recs.append(INDEX_RECORD.pack(k, off, n))
+            except struct.error:
+                pass  # key outside int64: left to the linear scan
+        st = os.stat(path)
+        header = INDEX_HEADER.pack(INDEX_MAGIC, st.st_size, st.st_mtime_ns, len(recs))
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
+        try:
+            with os.fdopen(tmp_fd, "wb") as f:
+                f.write(header)
+                f.writelines(recs)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path + INDEX_SUFFIX)
+
+    def build_offset_index(self, table: str):
+        """(Re)build the offset index of an existing snapshot in one binary pass."""
+        path, pk = self.paths[table], TABLE_KEYS[table]
+        entries: List[Tuple[int, int, int]] = []
+        off = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        entries.append((int(json.loads(line)[pk]), off, len(line)))
+                    except Exception:
+                        pass
+                off += len(line)
+        self._close_map(path)
+        self._write_offset_index(path, entries)
+        log.info("Built offset index for %s: %d rows", table, len(entries))
+
+    def _index_fresh(self, path: str) -> bool:
+        try:
+            st = os.stat(path)
+            with open(path + INDEX_SUFFIX, "rb") as f:
+                head = f.read(INDEX_HEADER.size)
+            magic, size, mtime_ns, _ = INDEX_HEADER.unpack(head)
+        except (OSError, struct.error):
+            return False
+        return magic == INDEX_MAGIC and (size, mtime_ns) == (
+            st.st_size,
+            st.st_mtime_ns,
+        )
+
+    def _open_map(self, table: str) -> Optional[tuple]:
+        """
+        (sig, snapshot mmap, index mmap, count) for `table`, cached until the
+        snapshot changes; a missing or stale sidecar is rebuilt first.
+        Caller holds the table lock.
+        """
+        path = self.paths[table]
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        sig = (st.st_size, st.st_mtime_ns)
+        maps = self._maps.get(path)
+        if maps is not None and maps[0] == sig:
+            return maps
+        self._close_map(path)  # replaced behind our back
+        if not self._index_fresh(path):
+            self.build_offset_index(table)
+        if st.st_size == 0:
+            return None  # nothing to map
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path + INDEX_SUFFIX, "rb") as f:
+            idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count = INDEX_HEADER.unpack_from(idx)[3]
+        self._maps[path] = (sig, data, idx, count)
+        return self._maps[path]
+
+    def _close_map(self, path: str):
+        # before os.replace: Windows cannot replace a mapped file
+        maps = self._maps.pop(path, None)
+        if maps is not None:
+            maps[1].close()
+            maps[2].close()
+
+    def _read_indexed(self, table: str, key: int) -> Optional[dict]:
+        """Binary-search the sidecar, then decode only that row from the mmap."""
+        maps = self._open_map(table)
+        if maps is None:
+            return None
+        _, data, idx, count = maps
+        lo, hi, base, size = 0, count, INDEX_HEADER.size, INDEX_RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if INDEX_RECORD.unpack_from(idx, base + mid * size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == count:
+            return None
+        k, off, n = INDEX_RECORD.unpack_from(idx, base + lo * size)
+        if k != key:
+            return None
+        return json.loads(data[off : off + n])
+
+    def _journal_overlay(self, table: str) -> Dict[object, list]:
+        """Folded journal of `table`, re-read only when a journal file changed."""
+        paths = [self._compacting_path(table), self.journal_paths[table]]
+        sig = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+                sig.append((st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                sig.append(None)
+        cached = self._overlays.get(table)
+        if cached is None or cached[0] != sig:
+            cached = (sig, self._read_overlay(table, paths))
+            self._overlays[table] = cached
+        return cached[1]
+
+    # --------------------- Metadata ---------------------
+    def read_meta(self) -> dict:
+        if self._meta is None:
+            self._meta = {}
+            if os.path.exists(self.meta_path):
                 try:
-                    n = int(f["ID"])
-                    if n + 1 > next_fid:
-                        next_fid = n + 1
-                except Exception:
-                    pass
-
-        for f in flights:
-            if "ID" not in f:
-                f["ID"] = next_fid
+                    with io.open(self.meta_path, "r", encoding="utf-8") as f:
+                        self._meta = json.load(f)
+                except Exception as e:
+                    log.warning("Bad meta file %s: %s", self.meta_path, e)
+        return self._meta
+
+    def update_meta(self, patch: dict):
+        """Merge `patch` into meta.json (small file, written atomically)."""
+        with self._meta_lock:
+            meta = dict(self.read_meta())
+            for k, v in patch.items():
+                # one level deep, so per-table entries can be patched alone
+                if isinstance(v, dict) and isinstance(meta.get(k), dict):
+                    v = {**meta[k], **v}
+                meta[k] = v
+            tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
+            with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+                self._fsync(f)
+            os.replace(tmp_path, self.meta_path)
+            self._fsync_dir()
+            self._meta = meta
+
+    # --------------------- Schema version ---------------------
+    def _file_sig(self, table: str) -> Optional[list]:
+        try:
+            st = os.stat(self.paths[table])
+        except FileNotFoundError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def _stamp_schema(self, table: str):
+        """Record that the snapshot of `table`, as it is now, is SCHEMA_VERSION."""
+        stamp = {"version": SCHEMA_VERSION, "file": self._file_sig(table)}
+        self.update_meta({"schema": {table: stamp}})
+
+    def schema_current(self, table: str) -> bool:
+        """
+        True if the snapshot needs no migration: it does not exist, or it is
+        the very file (size + mtime) last stamped with SCHEMA_VERSION.
+        """
+        sig = self._file_sig(table)
+        if sig is None:
+            return True
+        stamp = self.read_meta().get("schema", {}).get(table) or {}
+        return stamp.get("version") == SCHEMA_VERSION and stamp.get("file") == sig
+
+    # --------------------- Journal ---------------------
+    def _compacting_path(self, table: str) -> str:
+        # journal segment currently being folded by the compactor
+        return self.journal_paths[table] + ".compacting"
+
+    def append_journal(self, entries: List[dict]) -> Future:
+        """
+        Append row-level changes to the per-table journals.
+        Each entry: {"op": "put"|"delete", "table": ..., "key": ..., "row": {...}}
+        ("row" only for put). Cost is proportional to the entries, not the table.
+        The returned Future completes when the lines are durable under the
+        durability mode (at once for "none" and "always").
+        """
+        by_table: Dict[str, List[str]] = {}
+        for e in entries:
+            by_table.setdefault(e["table"], []).append(
+                json.dumps(e, ensure_ascii=False) + "\n"
+            )
+        created = False
+        fds: List[int] = []
+        with self._lock:
+            for table, lines in by_table.items():
+                path = self.journal_paths[table]
+                created |= not os.path.exists(path)
+                with io.open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    if self.durability == "always":
+                        self._fsync(f)
+                    elif self.durability == "batch":
+                        # the file written to, even if compaction renames it
+                        f.flush()
+                        fds.append(os.dup(f.fileno()))
+                self._journal_entries[table] += len(lines)
+                self._journal_bytes[table] += sum(len(x) for x in lines)
+            if created and self.durability == "always":
+                self._fsync_dir()
+        if fds:
+            fut = self._enqueue_commit(fds, created)
+        else:
+            fut = Future()
+            fut.set_result(None)
+        self.maybe_compact()
+        return fut
+
+    # --------------------- Durability ---------------------
+    def _fsync(self, f):
+        if self.durability != "none":
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _fsync_dir(self):
+        # makes a create / rename durable; not supported for directories on Windows
+        if self.durability == "none" or os.name == "nt":
+            return
+        fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _fsync_fd(self, fd: int):
+        os.fsync(fd)
+
+    def _enqueue_commit(self, fds: List[int], created: bool) -> Future:
+        fut: Future = Future()
+        with self._commit_cond:
+            self._commit_waiters.append(fut)
+            self._commit_seq += 1
+            self._commit_fds.extend(fds)
+            self._commit_dir |= created
+            if self._committer is None or not self._committer.is_alive():
+                self._committer = threading.Thread(
+                    target=self._commit_loop, name="rms-committer", daemon=True
+                )
+                self._committer.start()
+            self._commit_cond.notify_all()
+        return fut
+
+    def _commit_loop(self):
+        """Group commit: one fsync per journal for every append in the window."""
+        while True:
+            with self._commit_cond:
+                while not self._commit_waiters and not self._closing:
+                    self._commit_cond.wait()
+                if not self._commit_waiters:
+                    return
+            if not self._closing:
+                time.sleep(self.commit_window)  # let concurrent appends join
+            with self._commit_cond:
+                waiters, self._commit_waiters = self._commit_waiters, []
+                fds, self._commit_fds = self._commit_fds, []
+                sync_dir, self._commit_dir = self._commit_dir, False
+                upto = self._commit_seq
+            error = None
+            try:
+                # one fsync per journal file (the same file may be open many times)
+                seen = set()
+                for fd in fds:
+                    st = os.fstat(fd)
+                    if (st.st_dev, st.st_ino) not in seen:
+                        seen.add((st.st_dev, st.st_ino))
+                        self._fsync_fd(fd)
+                if sync_dir:
+                    self._fsync_dir()
+            except Exception as e:
+                log.exception("Journal commit failed")
+                error = e
+            finally:
+                for fd in fds:
+                    os.close(fd)
+            for w in waiters:
+                if error is None:
+                    w.set_result(None)
+                else:
+                    w.set_exception(error)
+            with self._commit_cond:
+                self._commit_done = upto
+                if error is not None:
+                    self._commit_error = error
+                self._commit_cond.notify_all()
+
+    def sync(self, timeout: Optional[float] = None):
+        """
+        Block until every journal append made so far is durable, including
+        batches the committer is fsyncing right now. Raises TimeoutError, or
+        the error of a failed commit.
+        """
+        with self._commit_cond:
+            target = self._commit_seq
+            if not self._commit_cond.wait_for(
+                lambda: self._commit_done >= target, timeout
+            ):
+                raise TimeoutError("journal commit still pending")
+            error, self._commit_error = self._commit_error, None
+        if error is not None:
+            raise error
+
+    def _read_overlay(self, table: str, paths: List[str]) -> Dict[object, list]:
+        """
+        Fold journal files (in order) into {key: [seq, row or None, voided]}.
+        seq orders rows that end up appended; voided marks keys deleted at
+        some point, whose snapshot position is then gone. Memory is bounded
+        by the journal, not the table.
+        """
+        state: Dict[object, list] = {}
+        for path in paths:
+            n = self._fold_entries(table, self._iter_jsonl(path), state)
+            if n:
+                log.info("Replaying %d journal entries for %s", n, table)
+        return state
+
+    def _fold_entries(
+        self, table: str, entries: Iterable[dict], state: Dict[object, list]
+    ) -> int:
+        seq = len(state) and max(st[0] for st in state.values()) + 1
+        n = 0
+        for e in entries:
+            n += 1
+            k = _norm_key(e.get("key"))
+            st = state.get(k)
+            if e.get("op") == "put" and isinstance(e.get("row"), dict):
+                if st is None:
+                    state[k] = [seq, e["row"], False]
+                else:
+                    if st[1] is None:
+                        st[0] = seq  # re-put after a delete: appended anew
+                    st[1] = e["row"]
+                seq += 1
+            elif e.get("op") == "delete":
+                if st is None:
+                    state[k] = [seq, None, True]
+                else:
+                    st[1], st[2] = None, True
+            else:
+                log.warning("Bad journal entry in %s: %s", table, e)
+        return n
+
+    def _overlay_rows(
+        self, table: str, rows: Iterable[dict], state: Dict[object, list]
+    ) -> Iterator[dict]:
+        """Stream `rows` with a journal overlay applied (same order as a replay)."""
+        if not state:
+            yield from rows
+            return
+        key = TABLE_KEYS[table]
+        placed = set()
+        for r in rows:
+            k = _norm_key(r.get(key))
+            st = state.get(k)
+            if st is None:
+                yield r
+            elif not st[2]:
+                placed.add(k)
+                yield st[1]
+        tail = sorted(
+            (st[0], st[1])
+            for k, st in state.items()
+            if st[1] is not None and (st[2] or k not in placed)
+        )
+        for _, r in tail:
+            yield r
+
+    def _journal_stats(self, table: str):
+        path = self.journal_paths[table]
+        if os.path.exists(path):
+            with io.open(path, "r", encoding="utf-8") as f:
+                n = sum(1 for line in f if line.strip())
+            self._journal_entries[table] = n
+            self._journal_bytes[table] = os.path.getsize(path)
+
+    def _clear_journal(self, table: str):
+        with self._lock:
+            for path in (self.journal_paths[table], self._compacting_path(table)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._journal_entries[table] = 0
+            self._journal_bytes[table] = 0
+
+    def _write_table(self, table: str, rows: Iterable[dict]):
+        # A full snapshot already contains every journaled change.
+        with self._table_locks[table]:
+            n = self._write_jsonl_atomic(self.paths[table], rows, TABLE_KEYS[table])
+            self._clear_journal(table)
+            self._snapshot_rows[table] = n
+            self._stamp_schema(table)
+            if self.columnar and isinstance(rows, list):
+                self._write_columnar(table, rows, self._file_sig(table))
+
+    # --------------------- Columnar snapshot ---------------------
+    def _read_columnar(self, table: str) -> Optional[List[dict]]:
+        """Rows from <table>.cols if it was built from the current JSONL, else None."""
+        path, sig = self.columnar_paths[table], self._file_sig(table)
+        if sig is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                built, rows = columnar.loads(f.read())
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring columnar snapshot %s: %s", path, e)
+            return None
+        return rows if built == sig else None
+
+    def _write_columnar(self, table: str, rows: List[dict], sig: Optional[list]):
+        path = self.columnar_paths[table]
+        data = columnar.dumps(rows, sig) if sig is not None else None
+        try:
+            if data is None:
+                # not encodable (mixed value types): JSONL only
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
+            with os.fdopen(tmp_fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Could not write columnar snapshot %s: %s", path, e)
+
+    # --------------------- Compaction ---------------------
+    def needs_compaction(self, table: str) -> bool:
+        n = self._journal_entries[table]
+        if n == 0:
+            return False
+        if self._journal_bytes[table] >= self.compact_bytes:
+            return True
+        limit = max(
+            self.compact_min_entries, self.compact_ratio * self._snapshot_rows[table]
+        )
+        return n >= limit
+
+    def maybe_compact(self):
+        """Start a background compaction if any journal crossed its threshold."""
+        tables = [t for t in TABLE_KEYS if self.needs_compaction(t)]
+        if not tables:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return  # next append re-checks once this run is done
+        self._compactor = threading.Thread(
+            target=self._compact_tables,
+            args=(tables,),
+            name="rms-compactor",
+            daemon=True,
+        )
+        self._compactor.start()
+
+    def _compact_tables(self, tables: List[str]):
+        for t in tables:
+            try:
+                self.compact(t)
+            except Exception:
+                log.exception("Compaction of %s failed", t)
+
+    def compact(self, table: str):
+        """
+        Fold the journal of `table` into a new snapshot.
+        The live journal is first renamed aside, so appends continue into a
+        fresh file while the snapshot is rebuilt; the swap uses os.replace.
+        """
+        with self._table_locks[table]:
+            live, seg = self.journal_paths[table], self._compacting_path(table)
+            with self._lock:
+                if os.path.exists(live):
+                    if os.path.exists(seg):
+                        # leftover from an interrupted run: keep entry order
+                        with io.open(live, "r", encoding="utf-8") as src, io.open(
+                            seg, "a", encoding="utf-8"
+                        ) as dst:
+                            shutil.copyfileobj(src, dst)
+                        os.remove(live)
+                    else:
+                        os.replace(live, seg)
+                self._journal_entries[table] = 0
+                self._journal_bytes[table] = 0
+            if not os.path.exists(seg):
+                return
+            # streamed: snapshot in, snapshot out, only the journal held in memory
+            state = self._read_overlay(table, [seg])
+            rows = self._overlay_rows(table, self._iter_jsonl(self.paths[table]), state)
+            n = self._write_jsonl_atomic(self.paths[table], rows, TABLE_KEYS[table])
+            os.remove(seg)
+            self._snapshot_rows[table] = n
+            self._stamp_schema(table)
+        log.info("Compacted %s journal -> %d rows", table, n)
+
+    def wait_compaction(self, timeout: Optional[float] = None):
+        t = self._compactor
+        if t is not None:
+            t.join(timeout)
+
+    def close(self):
+        self.wait_compaction()
+        with self._commit_cond:
+            self._closing = True
+            self._commit_cond.notify()
+        if self._committer is not None:
+            self._committer.join()
+        for t in TABLE_KEYS:
+            with self._table_locks[t]:
+                self._close_map(self.paths[t])
+
+    # --------------------- Read + Move ---------------------
+    def _migrate_row(self, table: str, r: dict) -> bool:
+        """Bring one snapshot row to the current schema; True if it changed."""
+        changed = False
+        if table == "clients":
+            # clients: ID -> client_id
+            if "client_id" not in r and "ID" in r:
+                r["client_id"] = r.pop("ID")
+                changed = True
+        elif table == "airlines":
+            # airlines: ID -> airline_id
+            if "airline_id" not in r and "ID" in r:
+                r["airline_id"] = r.pop("ID")
+                changed = True
+        else:
+            # flights: Client_ID/Airline_ID -> client_id/airline_id
+            if "Client_ID" in r and "client_id" not in r:
+                r["client_id"] = r.pop("Client_ID")
+                changed = True
+            if "Airline_ID" in r and "airline_id" not in r:
+                r["airline_id"] = r.pop("Airline_ID")
+                changed = True
+        if "Type" not in r:
+            # the lean loaders of a stamped file don't default it
+            r["Type"] = ROW_TYPES[table]
+            changed = True
+        return changed
+
+    def _scan_next_flight_id(self) -> int:
+        """Next free flight ID: max(meta high-water mark, max ID + 1), one pass."""
+        try:
+            n = int(self.read_meta().get("next_id", {}).get("flights", 1))
+        except Exception:
+            n = 1
+        for f in self._iter_jsonl(self.flights_path):
+            try:
+                n = max(n, int(f["ID"]) + 1)
+            except Exception:
+                pass
+        return n
+
+    def _iter_snapshot(self, table: str) -> Iterator[dict]:
+        count = 0
+        next_fid: Optional[int] = None
+        for r in self._iter_jsonl(self.paths[table]):
+            self._migrate_row(table, r)
+            if table == "flights" and "ID" not in r:
+                # If No Id, then Fill it (the scan runs only when one is missing)
+                if next_fid is None:
+                    next_fid = self._scan_next_flight_id()
+                r["ID"] = next_fid
                 next_fid += 1
-                migrated = True
+            count += 1
+            yield r
+        self._snapshot_rows[table] = count
+
+    def _iter_current(self, table: str) -> Iterator[dict]:
+        # stamped snapshot: rows are already current, no per-row checks
+        count = 0
+        for r in self._iter_jsonl(self.paths[table]):
+            count += 1
+            yield r
+        self._snapshot_rows[table] = count
+
+    def _table_rows(self, table: str, bulk: bool) -> Iterable[dict]:
+        self._journal_stats(table)
+        state = self._read_overlay(
+            table, [self._compacting_path(table), self.journal_paths[table]]
+        )
+        if not self.schema_current(table):
+            rows: Iterable[dict] = self._iter_snapshot(table)  # legacy: slow path
+        elif bulk:
+            rows = self._read_columnar(table) if self.columnar else None
+            if rows is None:
+                sig = self._file_sig(table)
+                rows = self._read_jsonl_bulk(self.paths[table])
+                if self.columnar and sig is not None and sig == self._file_sig(table):
+                    self._write_columnar(table, rows, sig)  # next start reads it
+            self._snapshot_rows[table] = len(rows)
+            return list(self._overlay_rows(table, rows, state)) if state else rows
+        else:
+            rows = self._iter_current(table)
+        out = self._overlay_rows(table, rows, state)
+        return list(out) if bulk else out
+
+    def iter_table(self, table: str) -> Iterator[dict]:
+        """
+        Rows of `table` one at a time: snapshot rows migrated to the current
+        schema, with journal changes (written in the current schema) applied
+        on top. Memory is one row plus the journal, whatever the table size.
+        Snapshots stamped with SCHEMA_VERSION skip the per-row migration.
+        """
+        return iter(self._table_rows(table, bulk=False))
 
-        if migrated:
-            log.warning("JsonlStorage: migrated legacy fields -> new schema")
-            self._write_jsonl_atomic(self.clients_path, clients)
-            self._write_jsonl_atomic(self.airlines_path, airlines)
-            self._write_jsonl_atomic(self.flights_path, flights)
+    def iter_clients(self) -> Iterator[dict]:
+        return self.iter_table("clients")
+
+    def iter_airlines(self) -> Iterator[dict]:
+        return self.iter_table("airlines")
+
+    def iter_flights(self) -> Iterator[dict]:
+        return self.iter_table("flights")
+
+    def migrate_table(self, table: str) -> bool:
+        """
+        Scan the snapshot of `table` and stamp it as SCHEMA_VERSION. Nothing
+        is written while rows are already current; from the first row that
+        changes, the untouched prefix is copied byte for byte into a temp
+        file, the rest is streamed through the migration and the file swapped
+        in. Flights without an ID go to a side file and are appended with
+        fresh IDs at the end, once the highest existing ID is known.
+        """
+        path = self.paths[table]
+        with self._table_locks[table]:
+            if not os.path.exists(path):
+                self._stamp_schema(table)
+                return False
+            try:
+                next_fid = int(self.read_meta().get("next_id", {}).get("flights", 1))
+            except Exception:
+                next_fid = 1
+            out = pending = None  # opened at the first row that changes
+            tmp_path = None
+            try:
+                with open(path, "rb") as src:
+                    off = 0
+                    for raw in src:
+                        start, off = off, off + len(raw)
+                        if not raw.strip():
+                            continue
+                        try:
+                            r = json.loads(raw.decode("utf-8"))
+                        except Exception as e:
+                            log.warning("Bad jsonl line in %s: %s", path, e)
+                            continue
+                        changed = self._migrate_row(table, r)
+                        no_id = table == "flights" and "ID" not in r
+                        if table == "flights" and not no_id:
+                            try:
+                                next_fid = max(next_fid, int(r["ID"]) + 1)
+                            except Exception:
+                                pass
+                        if out is None:
+                            if not (changed or no_id):
+                                continue
+                            tmp_fd, tmp_path = tempfile.mkstemp(
+                                prefix=".tmp_", dir=self.root
+                            )
+                            out = os.fdopen(tmp_fd, "wb")
+                            pending = tempfile.TemporaryFile(
+                                "w+", encoding="utf-8", dir=self.root
+                            )
+                            self._copy_prefix(path, out, start)
+                        if no_id:
+                            pending.write(json.dumps(r, ensure_ascii=False) + "\n")
+                            continue
+                        out.write(self._encode_line(r))
+                if out is not None:
+                    pending.seek(0)
+                    for line in pending:
+                        r = json.loads(line)
+                        r["ID"] = next_fid
+                        next_fid += 1
+                        out.write(self._encode_line(r))
+                    self._fsync(out)
+                    out.close()
+                    pending.close()
+            except BaseException:
+                for f in (out, pending):
+                    if f is not None:
+                        f.close()
+                if tmp_path is not None:
+                    os.remove(tmp_path)
+                raise
+            if out is not None:
+                self._close_map(path)  # the sidecar goes stale and is rebuilt
+                os.replace(tmp_path, path)
+                self._fsync_dir()
+                log.warning(
+                    "JsonlStorage: migrated %s -> schema %d", table, SCHEMA_VERSION
+                )
+            self._stamp_schema(table)
+        return out is not None
+
+    @staticmethod
+    def _encode_line(r: dict) -> bytes:
+        return (json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _copy_prefix(path: str, out, n: int):
+        # the rows before the first change are already current: copy as-is
+        with open(path, "rb") as head:
+            while n > 0:
+                buf = head.read(min(n, 1 << 20))
+                if not buf:
+                    break
+                out.write(buf)
+                n -= len(buf)
+
+    def load_table(self, table: str) -> List[dict]:
+        """
+        Every row of one table, by the fastest read available: the columnar
+        snapshot when it matches the JSONL, else the whole-file JSONL parse
+        (which then writes the columnar copy for the next start).
+        """
+        # migrate once (streamed), skipped when the stamp matches
+        if not self.schema_current(table):
+            self.migrate_table(table)
+        # then the lean loader: no per-row migration logic
+        return self._table_rows(table, bulk=True)
+
+    def load_all(self) -> Dict[str, List[dict]]:
+        clients, airlines, flights = (self.load_table(t) for t in TABLE_KEYS)
 
         log.info(
             "Loaded: clients=%d airlines=%d flights=%d",
@@ -210,12 +1089,63 @@ class JsonlStorage:
         )
         return {"clients": clients, "airlines": airlines, "flights": flights}
 
+    # --------------------- Row-level access (Storage protocol) ---------------------
+    @property
+    def row_level(self) -> bool:
+        # single-row writes are cheap only when they go to the journal
+        return self.journal
+
+    def get(self, table: str, key) -> Optional[dict]:
+        """
+        One row by primary key without loading the table: the journal overlay
+        first, then the snapshot through its offset index and an mmap. Legacy
+        (unstamped) snapshots fall back to a streamed scan.
+        """
+        k, pk = _norm_key(key), TABLE_KEYS[table]
+        if isinstance(k, int) and self.schema_current(table):
+            with self._table_locks[table]:
+                st = self._journal_overlay(table).get(k)
+                if st is not None:
+                    return dict(st[1]) if st[1] is not None else None
+                return self._read_indexed(table, k)
+        for r in self.iter_table(table):
+            if _norm_key(r.get(pk)) == k:
+                return r
+        return None
+
+    def put(self, table: str, row: dict):
+        key = row[TABLE_KEYS[table]]
+        return self.apply([{"op": "put", "table": table, "key": key, "row": row}])
+
+    def delete(self, table: str, key):
+        return self.apply([{"op": "delete", "table": table, "key": key}])
+
+    def scan(self, table: str) -> Iterator[dict]:
+        return self.iter_table(table)
+
+    def apply(self, entries: List[dict]) -> Future:
+        """Journaled: append the entries. Otherwise stream each touched table
+        through the changes into a new snapshot."""
+        if self.journal:
+            return self.append_journal(entries)
+        by_table: Dict[str, List[dict]] = {}
+        for e in entries:
+            by_table.setdefault(e["table"], []).append(e)
+        for table, changes in by_table.items():
+            state: Dict[object, list] = {}
+            self._fold_entries(table, changes, state)
+            rows = list(self._overlay_rows(table, self.iter_table(table), state))
+            self._write_table(table, rows)
+        done: Future = Future()
+        done.set_result(None)  # snapshots are fsynced as they are written
+        return done
+
     # --------------------- Write into Json ---------------------
     def write_clients(self, rows: List[dict]):
-        self._write_jsonl_atomic(self.clients_path, rows)
+        self._write_table("clients", rows)
 
     def write_airlines(self, rows: List[dict]):
-        self._write_jsonl_atomic(self.airlines_path, rows)
+        self._write_table("airlines", rows)
 
     def write_flights(self, rows: List[dict]):
-        self._write_jsonl_atomic(self.flights_path, rows)
+        self._write_table("flights", rows)
@@ -19,9 +19,17 @@ rms_dir = current_file.parent.parent
 # Tells Python where to locate the "services" module when using `from src.services import RMS`
 sys.path.append(str(rms_dir))
 
+import json
+import os
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 from src.services import RMS  # Import the RMS class from the services module
+from src.sqlite_storage import SqliteStorage
+from src.storage import TABLE_KEYS, JsonlStorage
 
 
 # 1. Mock Storage Class (matches the logic of the original storage module)
@@ -679,6 +687,1385 @@ class TestRMSFlight(unittest.TestCase):
         )
 
 
+# 6. Test Class: Journaled JsonlStorage (append-only change log + replay on load)
+# Uses a real JsonlStorage in a temporary directory
+class TestJsonlJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = JsonlStorage(root=self.tmp.name, journal=True)
+        self.rms = RMS(storage=self.storage)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _seed(self):
+        self.rms.create_client(
+            {
+                "Name": "Bob",
+                "Address1": "Street A",
+                "City": "Hong Kong",
+                "State": "Hong Kong",
+                "Zip": "123",
+                "Country": "Hong Kong",
+                "Phone": "1234567",
+            }
+        )
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.rms.create_flight(
+            {
+                "client_id": 1,
+                "airline_id": 1,
+                "Date": "2024-12-31 23:55",
+                "StartCity": "Hong Kong",
+                "EndCity": "London",
+            }
+        )
+
+    # Test: mutations only append to the journal, snapshots stay untouched
+    def test_mutation_appends_journal(self):
+        self._seed()
+        self.assertFalse(os.path.exists(self.storage.flights_path))
+        with open(self.storage.journal_paths["flights"], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1, "One flight mutation -> one journal line")
+        print(f"Test Details: flights journal lines = {len(lines)} (expected 1)")
+
+    # Test: load_all replays puts and deletes on top of the snapshot
+    def test_reload_replays_journal(self):
+        self._seed()
+        self.rms.update_client(1, {"Phone": "7654321"})
+        self.rms.create_airline({"CompanyName": "Air China"})
+        self.rms.delete_airline(1)  # cascades to the flight
+
+        reloaded = RMS(storage=JsonlStorage(root=self.tmp.name, journal=True))
+        self.assertEqual(reloaded.clients[0]["Phone"], "7654321")
+        self.assertEqual([a["airline_id"] for a in reloaded.airlines], [2])
+        self.assertEqual(reloaded.flights, [])
+        print(f"Test Details: reloaded airlines = {reloaded.airlines}")
+
+    # Test: compact() writes a full snapshot and folds the journal away
+    def test_compact_folds_journal(self):
+        self._seed()
+        for table in self.storage.journal_paths:
+            self.storage.compact(table)
+        for path in self.storage.journal_paths.values():
+            self.assertFalse(os.path.exists(path), "Journal should be folded")
+        reloaded = RMS(storage=JsonlStorage(root=self.tmp.name, journal=True))
+        self.assertEqual(len(reloaded.flights), 1)
+        print(f"Test Details: flights after fold = {len(reloaded.flights)} (1)")
+
+
+# 7. Test Class: Background compaction of journals into fresh snapshots
+class TestJournalCompaction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _storage(self):
+        # tiny thresholds so a handful of edits triggers compaction
+        return JsonlStorage(
+            root=self.tmp.name, journal=True, compact_min_entries=3, compact_ratio=0
+        )
+
+    # Test: crossing the threshold folds the journal into the snapshot
+    def test_compaction_folds_journal(self):
+        storage = self._storage()
+        rms = RMS(storage=storage)
+        for name in ("Cathay", "Air China", "Emirates", "Qantas"):
+            rms.create_airline({"CompanyName": name})
+        storage.wait_compaction()
+
+        with open(storage.airlines_path, encoding="utf-8") as f:
+            snapshot = f.read().splitlines()
+        self.assertGreaterEqual(len(snapshot), 3, "Snapshot should hold folded rows")
+        reloaded = RMS(storage=self._storage())
+        self.assertEqual(len(reloaded.airlines), 4)
+        print(f"Test Details: snapshot rows = {len(snapshot)}, reloaded = 4")
+
+    # Test: a segment left by an interrupted compaction is still replayed
+    def test_interrupted_compaction_is_replayed(self):
+        storage = self._storage()
+        rms = RMS(storage=storage)
+        rms.create_airline({"CompanyName": "Cathay"})
+        os.replace(
+            storage.journal_paths["airlines"],
+            storage.journal_paths["airlines"] + ".compacting",
+        )
+        rms.create_airline({"CompanyName": "Air China"})
+
+        reloaded = RMS(storage=self._storage())
+        names = [a["CompanyName"] for a in reloaded.airlines]
+        self.assertEqual(names, ["Cathay", "Air China"])
+        print(f"Test Details: replayed airlines = {names}")
+
+
+# 8. Test Class: Dirty-table tracking (only changed tables are persisted)
+class CountingStorage(MockStorage):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write_clients(self, data):
+        self.writes.append("clients")
+        super().write_clients(data)
+
+    def write_airlines(self, data):
+        self.writes.append("airlines")
+        super().write_airlines(data)
+
+    def write_flights(self, data):
+        self.writes.append("flights")
+        super().write_flights(data)
+
+
+class TestRMSDirtyTracking(unittest.TestCase):
+    def setUp(self):
+        self.storage = CountingStorage()
+        self.rms = RMS(storage=self.storage)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: creating an airline only rewrites the airlines table
+    def test_create_airline_writes_one_table(self):
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.assertEqual(self.storage.writes, ["airlines"])
+        print(f"Test Details: tables written = {self.storage.writes}")
+
+    # Test: save_all is a no-op when nothing changed
+    def test_save_all_noop_when_clean(self):
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.storage.writes.clear()
+        self.rms.save_all()
+        self.assertEqual(self.storage.writes, [], "Nothing dirty -> nothing written")
+        self.assertEqual(self.rms.dirty_tables(), [])
+        print(f"Test Details: tables written on clean save = {self.storage.writes}")
+
+
+# 9. Test Class: Primary-key indexes (id -> row / position)
+class TestRMSPrimaryKeyIndex(unittest.TestCase):
+    def setUp(self):
+        self.mock_storage = MockStorage()
+        # legacy string ids are normalised to int at load time
+        self.mock_storage.airlines = [
+            {"airline_id": "1", "CompanyName": "Cathay"},
+            {"airline_id": "2", "CompanyName": "Air China"},
+            {"airline_id": "3", "CompanyName": "Emirates"},
+        ]
+        self.rms = RMS(storage=self.mock_storage)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: ids loaded as strings are indexed as ints
+    def test_ids_normalised_on_load(self):
+        self.assertEqual(self.rms.airlines[1]["airline_id"], 2)
+        self.assertIs(self.rms.get_airline(2), self.rms.airlines[1])
+        self.assertIs(self.rms.get_airline("3"), self.rms.airlines[2])
+        print(f"Test Details: get_airline(2) -> {self.rms.get_airline(2)}")
+
+    # Test: indexes stay in sync after delete / update / create
+    def test_index_in_sync_after_mutations(self):
+        self.rms.delete_airline(1)
+        self.rms.update_airline(3, {"CompanyName": "Emirates Air"})
+        new = self.rms.create_airline({"CompanyName": "Qantas"})
+
+        self.assertIsNone(self.rms.get_airline(1))
+        self.assertEqual(self.rms._index_of(self.rms.airlines, "airline_id", 3)[0], 1)
+        self.assertEqual(self.rms.get_airline(3)["CompanyName"], "Emirates Air")
+        self.assertIs(self.rms.get_airline(new["airline_id"]), self.rms.airlines[-1])
+        print(f"Test Details: airlines after mutations = {self.rms.airlines}")
+
+
+# 10. Test Class: Reverse foreign-key indexes (client / airline -> flights)
+class TestRMSForeignKeyIndex(unittest.TestCase):
+    def setUp(self):
+        self.rms = RMS(storage=MockStorage())
+        for name, phone in (("Bob", "1234567"), ("Alice", "7654321")):
+            self.rms.create_client(
+                {
+                    "Name": name,
+                    "Address1": "Street A",
+                    "City": "Hong Kong",
+                    "State": "Hong Kong",
+                    "Zip": "123",
+                    "Country": "Hong Kong",
+                    "Phone": phone,
+                }
+            )
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.rms.create_airline({"CompanyName": "Air China"})
+        for cid, aid in ((1, 1), (1, 2), (2, 1), (1, 1)):
+            self.rms.create_flight(
+                {
+                    "client_id": cid,
+                    "airline_id": aid,
+                    "Date": "2024-12-31 23:55",
+                    "StartCity": "Hong Kong",
+                    "EndCity": "London",
+                }
+            )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: FK searches come straight from the indexes
+    def test_fk_searches(self):
+        by_client = [f["ID"] for f in self.rms.search_flights_by_client(1)]
+        by_pair = [f["ID"] for f in self.rms.search_flights_by_fk(1, 1)]
+        self.assertEqual(by_client, [1, 2, 4])
+        self.assertEqual(by_pair, [1, 4])
+        self.assertEqual(self.rms.search_flights_by_fk(2, 2), [])
+        print(f"Test Details: client 1 -> {by_client}, (1, 1) -> {by_pair}")
+
+    # Test: an FK change on update moves the flight between index buckets
+    def test_update_moves_flight(self):
+        self.rms.update_flight(2, {"client_id": 2})
+        ids = [f["ID"] for f in self.rms.search_flights_by_client(2)]
+        self.assertEqual(ids, [2, 3])
+        self.assertEqual([f["ID"] for f in self.rms.search_flights_by_fk(1, 2)], [])
+        print("Test Details: flight 2 moved from client 1 to client 2")
+
+    # Test: cascade delete only removes the indexed flights
+    def test_cascade_delete_uses_index(self):
+        self.rms.delete_airline(1)
+        self.assertEqual([f["ID"] for f in self.rms.flights], [2])
+        self.assertEqual(self.rms.search_flights_by_client(2), [])
+        print(f"Test Details: flights left = {[f['ID'] for f in self.rms.flights]}")
+
+    # Test: the enriched flight view follows client / airline / flight edits
+    def test_enriched_view_maintained(self):
+        before = self.rms.search_flights_by_client(1)
+        self.rms.update_client(1, {"Name": "Robert"})
+        self.rms.update_airline(2, {"CompanyName": "Air China Cargo"})
+        self.rms.update_flight(1, {"EndCity": "Paris"})
+
+        view = self.rms.list_flights_enriched()
+        self.assertEqual([f["ID"] for f in view], [1, 2, 3, 4], "Order is kept")
+        self.assertEqual(view[0]["ClientName"], "Robert")
+        self.assertEqual(view[0]["EndCity"], "Paris")
+        self.assertEqual(view[1]["Airline"], "Air China Cargo")
+        self.assertEqual(view[2]["ClientName"], "Alice")
+        self.assertEqual(before[0]["ClientName"], "Bob", "Earlier results unchanged")
+        print(f"Test Details: enriched view = {view}")
+
+
+# 11. Test Class: O(1) id allocation with persisted high-water marks
+class TestRMSIdAllocation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: deleting the newest row does not free its id
+    def test_no_reuse_after_tail_delete(self):
+        rms = RMS(storage=MockStorage())
+        rms.create_airline({"CompanyName": "Cathay"})
+        rms.create_airline({"CompanyName": "Air China"})
+        rms.delete_airline(2)
+        new = rms.create_airline({"CompanyName": "Emirates"})
+        self.assertEqual(new["airline_id"], 3)
+        print(f"Test Details: id after tail delete = {new['airline_id']} (3)")
+
+    # Test: the high-water mark survives a restart via meta.json
+    def test_high_water_mark_persisted(self):
+        rms = RMS(storage=JsonlStorage(root=self.tmp.name))
+        rms.create_airline({"CompanyName": "Cathay"})
+        rms.create_airline({"CompanyName": "Air China"})
+        rms.delete_airline(2)
+
+        reloaded = RMS(storage=JsonlStorage(root=self.tmp.name))
+        new = reloaded.create_airline({"CompanyName": "Emirates"})
+        self.assertEqual(new["airline_id"], 3)
+        print(f"Test Details: id after restart = {new['airline_id']} (3)")
+
+    # Test: creates alone write no meta; only an uncovered delete does
+    def test_creates_skip_meta_write(self):
+        st = JsonlStorage(root=self.tmp.name, journal=True)
+        rms = RMS(storage=st)
+        for name in ("Cathay", "Air China", "Emirates"):
+            rms.create_airline({"CompanyName": name})
+        self.assertNotIn("next_id", st.read_meta())
+        rms.delete_airline(3)
+        self.assertEqual(st.read_meta()["next_id"]["airlines"], 4)
+        print(f"Test Details: meta after tail delete = {st.read_meta()['next_id']}")
+
+
+# 12. Test Class: Trigram index behind client Name / Phone search
+class TestRMSClientTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.rms = RMS(storage=MockStorage())
+        for name, phone in (("Alice Wong", "13800138000"), ("Bob Li", "22223333")):
+            self.rms.create_client(
+                {
+                    "Name": name,
+                    "Address1": "Street A",
+                    "City": "Hong Kong",
+                    "State": "Hong Kong",
+                    "Zip": "123",
+                    "Country": "Hong Kong",
+                    "Phone": phone,
+                }
+            )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _names(self, q):
+        return [c["Name"] for c in self.rms.search_clients(q)]
+
+    # Test: long, short and cross-word queries are verified against the text
+    def test_substring_queries(self):
+        self.assertEqual(self._names("WONG"), ["Alice Wong"])
+        self.assertEqual(self._names("li"), ["Alice Wong", "Bob Li"])
+        self.assertEqual(self._names("ce w"), ["Alice Wong"])
+        self.assertEqual(self._names("3333"), ["Bob Li"])
+        self.assertEqual(self._names("wongx"), [])
+        print("Test Details: 'WONG', 'li', 'ce w', '3333', 'wongx' matched as expected")
+
+    # Test: the index follows updates and deletes
+    def test_index_follows_mutations(self):
+        self.rms.update_client(1, {"Name": "Carol Chan"})
+        self.rms.delete_client(2)
+        self.assertEqual(self._names("alice"), [])
+        self.assertEqual(self._names("chan"), ["Carol Chan"])
+        self.assertEqual(self._names("bob"), [])
+        print("Test Details: renamed and deleted clients no longer match")
+
+
+# 13. Test Class: CompanyName prefix index for airline autocomplete
+class TestRMSAirlineSuggest(unittest.TestCase):
+    def setUp(self):
+        self.rms = RMS(storage=MockStorage())
+        for name in ("Cathay Pacific", "Air China", "Air  France", "Emirates"):
+            self.rms.create_airline({"CompanyName": name})
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _names(self, prefix, limit=10):
+        return [a["CompanyName"] for a in self.rms.suggest_airlines(prefix, limit)]
+
+    # Test: prefix matches are case-insensitive, sorted and capped by limit
+    def test_suggest_prefix(self):
+        self.assertEqual(self._names("air"), ["Air China", "Air France"])
+        self.assertEqual(self._names("AIR F"), ["Air France"])
+        self.assertEqual(self._names("", limit=2), ["Air China", "Air France"])
+        self.assertEqual(self._names("x"), [])
+        print(f"Test Details: 'air' -> {self._names('air')}")
+
+    # Test: renames and deletes are reflected in suggestions
+    def test_suggest_follows_mutations(self):
+        self.rms.update_airline(1, {"CompanyName": "Air Hong Kong"})
+        self.rms.delete_airline(2)
+        self.assertEqual(self._names("air"), ["Air France", "Air Hong Kong"])
+        self.assertEqual(self._names("cathay"), [])
+        print(f"Test Details: 'air' after edits -> {self._names('air')}")
+
+
+# 14. Test Class: Paged / cursor-based queries
+class TestRMSPagedQueries(unittest.TestCase):
+    def setUp(self):
+        self.rms = RMS(storage=MockStorage())
+        for i, name in enumerate(("Eve", "Bob", "Dan", "Amy", "Cat")):
+            self.rms.create_client(
+                {
+                    "Name": name,
+                    "Address1": "Street A",
+                    "City": "Hong Kong",
+                    "State": "Hong Kong",
+                    "Zip": "123",
+                    "Country": "Hong Kong",
+                    "Phone": f"555000{i}",
+                }
+            )
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        for cid in (1, 2, 1, 3, 1):
+            self.rms.create_flight(
+                {
+                    "client_id": cid,
+                    "airline_id": 1,
+                    "Date": "2024-12-31 23:55",
+                    "StartCity": "Hong Kong",
+                    "EndCity": "London",
+                }
+            )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: limit/offset paging reports total and has_more
+    def test_offset_paging(self):
+        page = self.rms.query_clients(limit=2, offset=4)
+        self.assertEqual([c["client_id"] for c in page.rows], [5])
+        self.assertEqual(page.total, 5)
+        self.assertFalse(page.has_more)
+        print(f"Test Details: offset 4 -> {[c['Name'] for c in page.rows]}")
+
+    # Test: cursors walk a non-key sort order without gaps or repeats
+    def test_cursor_paging_by_name(self):
+        names, cursor = [], None
+        while True:
+            page = self.rms.query_clients(sort_key="Name", limit=2, cursor=cursor)
+            names += [c["Name"] for c in page.rows]
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(names, ["Amy", "Bob", "Cat", "Dan", "Eve"])
+        print(f"Test Details: pages by name -> {names}")
+
+    # Test: flight queries combine the text query with FK filters
+    def test_flight_query_filters(self):
+        page = self.rms.query_flights("eve", airline_id=1, limit=2)
+        self.assertEqual([f["ID"] for f in page.rows], [1, 3])
+        self.assertTrue(page.has_more)
+        self.assertEqual(page.rows[0]["ClientName"], "Eve")
+        rest = self.rms.query_flights("eve", cursor=page.next_cursor)
+        self.assertEqual([f["ID"] for f in rest.rows], [5])
+        print(f"Test Details: 'eve' flights total = {page.total} (3)")
+
+
+# 15. Test Class: Departure-time index and time-range queries
+class TestRMSFlightTimeIndex(unittest.TestCase):
+    def setUp(self):
+        st = MockStorage()
+        st.clients = [{"client_id": 1, "Name": "Amy", "Phone": "5550001"}]
+        st.airlines = [{"airline_id": 1, "CompanyName": "Cathay"}]
+        # loaded out of order, plus one legacy row with an unparseable Date
+        dates = ("2025-03-01 10:00", "2025-01-15 08:30", "2025-02-01 00:00", "soon")
+        route = {"StartCity": "Hong Kong", "EndCity": "London"}
+        st.flights = [
+            {"ID": i, "client_id": 1, "airline_id": 1, "Date": d, **route}
+            for i, d in enumerate(dates, start=1)
+        ]
+        self.rms = RMS(storage=st)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: range is half-open and returned in departure order
+    def test_flights_between(self):
+        rows = self.rms.flights_between("2025-01-15 08:30", "2025-03-01 10:00")
+        self.assertEqual([f["ID"] for f in rows], [2, 3])
+        self.assertEqual(rows[0]["ClientName"], "Amy")
+        everything = self.rms.flights_between(None, None)
+        self.assertEqual([f["ID"] for f in everything], [2, 3, 1])
+        with self.assertRaises(ValueError):
+            self.rms.flights_between("next week", None)
+        print(f"Test Details: Jan-Mar window -> {[f['ID'] for f in rows]}")
+
+    # Test: ingested chunks are bulk-merged into the time index, still sorted
+    def test_ingest_bulk_merges_time_index(self):
+        route = {"client_id": 1, "airline_id": 1, "StartCity": "A", "EndCity": "B"}
+        chunk = [
+            {"ID": 5, "Date": "2025-01-20 09:00", **route},
+            {"ID": 6, "Date": "2024-12-31 23:00", **route},
+        ]
+        self.rms.ingest("flights", chunk)
+        ids = [f["ID"] for f in self.rms.flights_between(None, None)]
+        self.assertEqual(ids, [6, 2, 5, 3, 1])
+        self.assertIsNone(self.rms._time_batch)
+        print(f"Test Details: time order after ingest -> {ids}")
+
+    # Test: a cascade delete drops its flights from the index in one pass
+    def test_cascade_delete_bulk_removes(self):
+        self.rms.ingest("clients", [{"client_id": 2, "Name": "Bo", "Phone": "555"}])
+        route = {"client_id": 2, "airline_id": 1, "StartCity": "A", "EndCity": "B"}
+        chunk = [
+            {"ID": i, "Date": f"2025-01-{i % 28 + 1:02d} 12:00", **route}
+            for i in range(10, 50)
+        ]
+        self.rms.ingest("flights", chunk)
+        self.rms.delete_client(2)
+        ids = [f["ID"] for f in self.rms.flights_between(None, None)]
+        self.assertEqual(ids, [2, 3, 1])
+        self.assertEqual(len(self.rms._flights_by_time), 3)
+        print(f"Test Details: time order after cascade -> {ids}")
+
+    # Test: upcoming flights follow creates, reschedules and deletes
+    def test_upcoming_flights(self):
+        now = datetime(2025, 1, 20)
+        self.assertEqual([f["ID"] for f in self.rms.upcoming_flights(5, now)], [3, 1])
+        new = self.rms.create_flight(
+            {
+                "client_id": 1,
+                "airline_id": 1,
+                "Date": "2025-01-25 09:00",
+                "StartCity": "Hong Kong",
+                "EndCity": "London",
+            }
+        )
+        self.rms.update_flight(1, {"Date": "2025-01-21 07:00"})
+        self.rms.delete_flight(3)
+        ids = [f["ID"] for f in self.rms.upcoming_flights(5, now)]
+        self.assertEqual(ids, [1, new["ID"]])
+        self.assertEqual(len(self.rms.upcoming_flights(1, now)), 1)
+        print(f"Test Details: upcoming after edits -> {ids}")
+
+
+# 16. Test Class: Route index over StartCity / EndCity
+class TestRMSRouteIndex(unittest.TestCase):
+    def setUp(self):
+        st = MockStorage()
+        st.clients = [{"client_id": 1, "Name": "Amy", "Phone": "5550001"}]
+        st.airlines = [{"airline_id": 1, "CompanyName": "Cathay"}]
+        routes = (("London", "Paris"), ("Paris", "London"), ("london", " paris "))
+        st.flights = [
+            {"ID": i, "client_id": 1, "airline_id": 1, "StartCity": a, "EndCity": b}
+            for i, (a, b) in enumerate(routes, start=1)
+        ]
+        self.rms = RMS(storage=st)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _ids(self, rows):
+        return [f["ID"] for f in rows]
+
+    # Test: origin-destination lookups are directional and case-insensitive
+    def test_search_by_route(self):
+        by_route = self.rms.search_flights_by_route
+        self.assertEqual(self._ids(by_route("LONDON", "Paris")), [1, 3])
+        self.assertEqual(self._ids(by_route("Paris", "London")), [2])
+        self.assertEqual(self.rms.search_flights_by_route("Paris", "Rome"), [])
+        print("Test Details: London -> Paris = [1, 3]")
+
+    # Test: city lookups follow reroutes and deletes
+    def test_touching_city_follows_mutations(self):
+        touching = self.rms.flights_touching_city
+        self.assertEqual(self._ids(touching("paris")), [1, 2, 3])
+        route = {"StartCity": "Tokyo", "EndCity": "Hong Kong"}
+        self.rms.update_flight(2, {"Date": "2025-01-01 10:00", **route})
+        self.rms.delete_flight(3)
+        self.assertEqual(self._ids(touching("Paris")), [1])
+        self.assertEqual(self._ids(touching("tokyo")), [2])
+        self.assertEqual(self.rms.search_flights_by_route("Paris", "London"), [])
+        print(f"Test Details: Paris after edits -> {self._ids(touching('Paris'))}")
+
+
+# 17. Test Class: Fine-grained change events
+class TestRMSChangeEvents(unittest.TestCase):
+    def setUp(self):
+        st = MockStorage()
+        st.clients = [{"client_id": 1, "Name": "Amy", "Phone": "5550001"}]
+        st.airlines = [{"airline_id": 1, "CompanyName": "Cathay"}]
+        st.flights = [
+            {"ID": 1, "client_id": 1, "airline_id": 1, "Date": "2025-01-01 10:00"}
+        ]
+        self.rms = RMS(storage=st)
+        self.events = []
+        self.unsubscribe = self.rms.subscribe(
+            lambda ev: self.events.append((ev.table, ev.kind, ev.key))
+        )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: insert / update / delete each publish one event per row
+    def test_crud_events(self):
+        a = self.rms.create_airline({"CompanyName": "Emirates"})
+        self.rms.update_airline(a["airline_id"], {"CompanyName": "Emirates Air"})
+        self.rms.delete_airline(a["airline_id"])
+        self.assertEqual(
+            self.events,
+            [
+                ("airlines", "insert", 2),
+                ("airlines", "update", 2),
+                ("airlines", "delete", 2),
+            ],
+        )
+        print(f"Test Details: events -> {self.events}")
+
+    # Test: renames reach dependent flight rows; cascades publish deletes
+    def test_dependent_and_cascade_events(self):
+        self.rms.update_airline(1, {"CompanyName": "Cathay Pacific"})
+        self.assertIn(("flights", "update", 1), self.events)
+        self.assertEqual(self.rms.get_flight_enriched(1)["Airline"], "Cathay Pacific")
+        self.events.clear()
+        self.rms.delete_client(1)
+        self.assertEqual(
+            self.events, [("clients", "delete", 1), ("flights", "delete", 1)]
+        )
+        print(f"Test Details: cascade events -> {self.events}")
+
+    # Test: a failing listener is isolated and unsubscribe stops delivery
+    def test_listener_errors_and_unsubscribe(self):
+        def boom(ev):
+            raise RuntimeError("listener bug")
+
+        self.rms.subscribe(boom)
+        self.rms.create_airline({"CompanyName": "Qantas"})
+        self.assertEqual(len(self.events), 1)
+        self.unsubscribe()
+        self.rms.create_airline({"CompanyName": "Finnair"})
+        self.assertEqual(len(self.events), 1)
+        print("Test Details: listener error logged, unsubscribe honoured")
+
+
+# 18. Test Class: Cached combo-box label lists
+class TestRMSComboCache(unittest.TestCase):
+    def setUp(self):
+        st = MockStorage()
+        st.airlines = [
+            {"airline_id": i, "CompanyName": n}
+            for i, n in enumerate(("Cathay", "Emirates", "Qantas"), start=1)
+        ]
+        self.rms = RMS(storage=st)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: repeated calls return the same cached list
+    def test_combo_is_cached(self):
+        first = self.rms.list_airlines_combo()
+        self.assertIs(self.rms.list_airlines_combo(), first)
+        self.assertEqual(first, ["1 - Cathay", "2 - Emirates", "3 - Qantas"])
+        print(f"Test Details: cached combo -> {first}")
+
+    # Test: edits patch the cached list in place, matching a fresh build
+    def test_combo_patched_on_edit(self):
+        labels = self.rms.list_airlines_combo()
+        self.rms.create_airline({"CompanyName": "Finnair"})
+        self.rms.update_airline(2, {"CompanyName": "Emirates Air"})
+        self.rms.delete_airline(1)
+        self.assertIs(self.rms.list_airlines_combo(), labels)
+        fresh = [f"{a['airline_id']} - {a['CompanyName']}" for a in self.rms.airlines]
+        self.assertEqual(labels, fresh)
+        print(f"Test Details: patched combo -> {labels}")
+
+
+# 19. Test Class: Chunked ingest for background loading
+class TestRMSIngest(unittest.TestCase):
+    def setUp(self):
+        self.st = MockStorage()
+        self.st.clients = [
+            {"client_id": i, "Name": f"Client {i}", "Phone": f"55500{i:02d}"}
+            for i in range(1, 6)
+        ]
+        self.st.airlines = [{"airline_id": 1, "CompanyName": "Cathay"}]
+        self.st.flights = [
+            {"ID": i, "client_id": (i % 5) + 1, "airline_id": 1} for i in range(1, 8)
+        ]
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: chunked ingest ends in the same state as a synchronous load
+    def test_ingest_matches_load(self):
+        eager = RMS(storage=self.st)
+        lazy = RMS(storage=MockStorage(), load=False)
+        data = self.st.load_all()
+        for table in ("clients", "airlines", "flights"):
+            rows = [dict(r) for r in data[table]]
+            for i in range(0, len(rows), 3):
+                lazy.ingest(table, rows[i : i + 3])
+        lazy.finish_ingest()
+        self.assertEqual(lazy.list_flights_enriched(), eager.list_flights_enriched())
+        self.assertEqual(lazy.query_clients("client 3").total, 1)
+        self.assertEqual(lazy.dirty_tables(), [])
+        new = lazy.create_airline({"CompanyName": "Qantas"})
+        self.assertEqual(new["airline_id"], 2)
+        print(f"Test Details: ingested {len(lazy.flights)} flights in chunks of 3")
+
+
+# 20. Test Class: Cached filtered results and worker-thread queries
+class TestRMSQueryResultCache(unittest.TestCase):
+    def setUp(self):
+        st = MockStorage()
+        st.clients = [
+            {"client_id": i, "Name": f"Client {i}", "Phone": f"55500{i:02d}"}
+            for i in range(1, 31)
+        ]
+        self.rms = RMS(storage=st)
+        self.calls = 0
+        snapshot = self.rms._client_snapshot
+
+        def counting(q):
+            self.calls += 1
+            return snapshot(q)
+
+        self.rms._client_snapshot = counting
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: paging one filtered result matches once; an edit invalidates it
+    def test_filtered_result_reused_until_edit(self):
+        for offset in (0, 5, 10):
+            self.rms.query_clients("client 1", limit=5, offset=offset)
+        self.assertEqual(self.calls, 1)
+        self.rms.delete_client(10)
+        page = self.rms.query_clients("client 1", limit=20)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(page.total, 10)  # 1, 11-19
+        print(f"Test Details: match calls = {self.calls}, total = {page.total}")
+
+    # Test: sorts are cached per table; the id order is patched, not rebuilt
+    def test_sort_caches_per_table(self):
+        by_name = self.rms._sorted_entries("clients", "Name")
+        by_id = self.rms._sorted_entries("clients", "client_id")
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.assertIs(self.rms._sorted_entries("clients", "Name"), by_name)
+        self.rms.delete_client(7)
+        self.assertIs(self.rms._sorted_entries("clients", "client_id"), by_id)
+        ids = [k for _, k in by_id]
+        self.assertEqual(ids, sorted(self.rms._by_id["clients"]))
+        self.assertNotIn(7, ids)
+        page = self.rms.query_clients(limit=3, offset=5)
+        self.assertEqual([c["client_id"] for c in page.rows], [6, 8, 9])
+        print(f"Test Details: id order after delete -> {ids[4:8]}")
+
+    # Test: queries submitted from a worker thread see a consistent index
+    def test_query_on_worker_thread(self):
+        with ThreadPoolExecutor(2) as pool:
+            futs = [pool.submit(self.rms.query_clients, "client 2") for _ in range(4)]
+            self.rms.delete_client(20)
+            totals = {f.result().total for f in futs}
+        self.assertTrue(totals <= {11, 10})
+        self.assertEqual(self.rms.query_clients("client 2").total, 10)
+        print(f"Test Details: worker totals = {sorted(totals)}")
+
+    # Test: matching runs without the lock; a write meanwhile forces a re-match
+    def test_match_outside_lock(self):
+        match = self.rms._match_client_snapshot
+
+        def writing(q, snap):
+            with ThreadPoolExecutor(1) as pool:
+                # would deadlock if the query still held rms.lock
+                pool.submit(self.rms.delete_client, 12).result(timeout=5)
+            self.rms._match_client_snapshot = match
+            return match(q, snap)
+
+        self.rms._match_client_snapshot = writing
+        page = self.rms.query_clients("client 1", limit=20)
+        self.assertEqual(page.total, 10)  # 1, 10-19 without 12
+        self.assertNotIn(12, [c["client_id"] for c in page.rows])
+        print(f"Test Details: total after concurrent delete = {page.total}")
+
+
+# 21. Test Class: Streaming JSONL readers (iter_clients / iter_flights ...)
+class TestJsonlStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = JsonlStorage(root=self.tmp.name, journal=True)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _write(self, path, rows):
+        with open(path, "w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+    # Test: legacy rows are migrated on the fly and nothing is rewritten
+    def test_iter_migrates_without_writing(self):
+        self._write(
+            self.storage.flights_path,
+            [{"Client_ID": 1, "Airline_ID": 2}, {"ID": 7, "client_id": 1}],
+        )
+        before = os.path.getmtime(self.storage.flights_path)
+        rows = self.storage.iter_flights()
+        first = next(rows)
+        self.assertEqual((first["client_id"], first["airline_id"]), (1, 2))
+        self.assertEqual([f["ID"] for f in [first, *rows]], [8, 7])
+        self.assertEqual(os.path.getmtime(self.storage.flights_path), before)
+        print(f"Test Details: streamed legacy flight -> {first}")
+
+    # Test: the journal overlay matches replay order, incl. delete + re-put
+    def test_iter_applies_journal_in_order(self):
+        self._write(
+            self.storage.clients_path,
+            [{"client_id": i, "Name": f"C{i}"} for i in (1, 2, 3)],
+        )
+        self.storage.append_journal(
+            [
+                {"op": "put", "table": "clients", "key": 2, "row": {"client_id": 2}},
+                {"op": "delete", "table": "clients", "key": 1},
+                {"op": "put", "table": "clients", "key": 4, "row": {"client_id": 4}},
+                {"op": "put", "table": "clients", "key": 1, "row": {"client_id": 1}},
+                {"op": "delete", "table": "clients", "key": 3},
+            ]
+        )
+        rows = list(self.storage.iter_clients())
+        self.assertEqual([c["client_id"] for c in rows], [2, 4, 1])
+        self.assertNotIn("Name", rows[0])
+        print(f"Test Details: overlay order -> {[c['client_id'] for c in rows]}")
+
+
+# 22. Test Class: Per-table streaming migration with a schema stamp
+class TestJsonlSchemaMigration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _write(self, path, rows):
+        with open(path, "w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+    # Test: only the legacy table is rewritten; ID-less flights get fresh IDs
+    def test_migrates_only_legacy_tables(self):
+        st = JsonlStorage(root=self.tmp.name)
+        self._write(st.clients_path, [{"ID": 5, "Name": "Amy"}])
+        airline = {"airline_id": 1, "CompanyName": "Cathay", "Type": "airline"}
+        self._write(st.airlines_path, [airline])
+        self._write(
+            st.flights_path,
+            [{"client_id": 5}, {"ID": 9, "client_id": 5}, {"Client_ID": 5}],
+        )
+        airlines_before = os.stat(st.airlines_path).st_mtime_ns
+        data = st.load_all()
+        self.assertEqual(data["clients"][0]["client_id"], 5)
+        self.assertEqual([f["ID"] for f in data["flights"]], [9, 10, 11])
+        self.assertEqual(os.stat(st.airlines_path).st_mtime_ns, airlines_before)
+        self.assertTrue(all(st.schema_current(t) for t in TABLE_KEYS))
+        print(f"Test Details: flight IDs after migration -> {[9, 10, 11]}")
+
+    # Test: a stamped dataset skips the migration scan on the next start
+    def test_stamp_skips_migration(self):
+        st = JsonlStorage(root=self.tmp.name)
+        self._write(st.clients_path, [{"ID": 1, "Name": "Amy"}])
+        st.load_all()
+        again = JsonlStorage(root=self.tmp.name)
+        calls = []
+        again.migrate_table = lambda t: calls.append(t)
+        self.assertEqual(again.load_all()["clients"][0]["client_id"], 1)
+        self.assertEqual(calls, [])
+        # a file replaced behind our back is checked again
+        self._write(st.clients_path, [{"ID": 2, "Name": "Bob"}])
+        os.utime(st.clients_path, ns=(1, 1))
+        again.load_all()
+        self.assertEqual(calls, ["clients"])
+        print("Test Details: stamped tables skipped; changed file re-checked")
+
+    # Test: current files are stamped in place; a rewrite keeps the prefix bytes
+    def test_rewrite_starts_at_first_changed_row(self):
+        st = JsonlStorage(root=self.tmp.name)
+        airline = {"airline_id": 1, "CompanyName": "Cathay", "Type": "airline"}
+        self._write(st.airlines_path, [airline])
+        before = os.stat(st.airlines_path)
+        self.assertFalse(st.migrate_table("airlines"))
+        after = os.stat(st.airlines_path)
+        self.assertEqual(after.st_ino, before.st_ino)
+        self.assertEqual(after.st_mtime_ns, before.st_mtime_ns)
+        self.assertTrue(st.schema_current("airlines"))
+        with open(st.clients_path, "w", encoding="utf-8") as f:
+            f.write('{"client_id":1,"Type":"client"}\n{"ID": 2, "Name": "Bob"}\n')
+        self.assertTrue(st.migrate_table("clients"))
+        with open(st.clients_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], '{"client_id":1,"Type":"client"}')
+        self.assertEqual(json.loads(lines[1])["client_id"], 2)
+        print(f"Test Details: migrated clients file -> {lines}")
+
+    # Test: rows without Type are rewritten with it before the file is stamped
+    def test_missing_type_is_migrated(self):
+        st = JsonlStorage(root=self.tmp.name)
+        with open(st.clients_path, "w", encoding="utf-8") as f:
+            f.write('{"client_id":1,"Name":"A"}\n')
+        first = st.load_all()["clients"]
+        again = JsonlStorage(root=self.tmp.name).load_all()["clients"]
+        expected = [{"client_id": 1, "Name": "A", "Type": "client"}]
+        self.assertEqual((first, again), (expected, expected))
+        self.assertTrue(st.schema_current("clients"))
+        print(f"Test Details: loaded after stamp -> {again}")
+
+
+# 23. Test Class: Lean loader for schema-stamped snapshots
+class TestJsonlLeanLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.st = JsonlStorage(root=self.tmp.name, journal=True)
+        self.st.write_airlines(
+            [{"airline_id": i, "CompanyName": f"Air {i}"} for i in (1, 2, 3)]
+        )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: stamped tables load through the bulk parser, journal still applied
+    def test_stamped_table_uses_lean_path(self):
+        self.assertTrue(self.st.schema_current("airlines"))
+        self.st.append_journal([{"op": "delete", "table": "airlines", "key": 2}])
+        self.st._iter_snapshot = None  # the per-row migrating reader must not run
+        rows = self.st.load_all()["airlines"]
+        self.assertEqual([a["airline_id"] for a in rows], [1, 3])
+        print(f"Test Details: lean load -> {[a['airline_id'] for a in rows]}")
+
+    # Test: a corrupt line makes the bulk parse fall back to the line reader
+    def test_bulk_parse_falls_back_on_bad_line(self):
+        with open(self.st.airlines_path, "a", encoding="utf-8") as f:
+            f.write("{not json\n")
+        rows = self.st._read_jsonl_bulk(self.st.airlines_path)
+        self.assertEqual(len(rows), 3)
+        print(f"Test Details: rows after fallback = {len(rows)} (3)")
+
+
+# 24. Test Class: SQLite storage backend (row-level Storage protocol)
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "rms.sqlite3")
+        self.storage = SqliteStorage(self.path)
+        self.rms = RMS(storage=self.storage)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.rms.close()
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _seed(self):
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.rms.create_client(
+            {
+                "Name": "Bob",
+                "Address1": "Street A",
+                "City": "Hong Kong",
+                "State": "Hong Kong",
+                "Zip": "123",
+                "Country": "Hong Kong",
+                "Phone": "1234567",
+            }
+        )
+        for date in ("2025-02-01 10:00", "2025-01-01 10:00"):
+            self.rms.create_flight(
+                {
+                    "client_id": 1,
+                    "airline_id": 1,
+                    "Date": date,
+                    "StartCity": "Hong Kong",
+                    "EndCity": "London",
+                }
+            )
+
+    # Test: a new database takes over JSONL tables next to it, only once
+    def test_imports_existing_jsonl_once(self):
+        root = os.path.join(self.tmp.name, "install")
+        jsonl = JsonlStorage(root=root, journal=True)
+        jsonl.write_airlines([{"airline_id": 1, "CompanyName": "Cathay"}])
+        qantas = {"airline_id": 2, "CompanyName": "Qantas"}
+        jsonl.apply([{"op": "put", "table": "airlines", "key": 2, "row": qantas}])
+        jsonl.update_meta({"next_id": {"airlines": 5}})
+        jsonl.close()
+        path = os.path.join(root, "rms.sqlite3")
+        st = SqliteStorage(path)
+        names = [a["CompanyName"] for a in st.load_all()["airlines"]]
+        self.assertEqual(names, ["Cathay", "Qantas"])
+        self.assertEqual(st.read_meta()["next_id"], {"airlines": 5})
+        st.apply([{"op": "delete", "table": "airlines", "key": k} for k in (1, 2)])
+        st.close()
+        st = SqliteStorage(path)
+        self.assertEqual(st.load_all()["airlines"], [])
+        st.close()
+        print(f"Test Details: imported airlines -> {names}")
+
+    # Test: edits are saved row by row and survive a reopen
+    def test_rms_round_trip(self):
+        self._seed()
+        self.rms.delete_flight(1)
+        self.rms.close()
+        reopened = RMS(storage=SqliteStorage(self.path))
+        self.assertEqual([f["ID"] for f in reopened.flights], [2])
+        self.assertEqual(reopened.get_client(1)["Name"], "Bob")
+        self.assertEqual(reopened.create_flight(dict(reopened.flights[0]))["ID"], 3)
+        reopened.close()
+        self.rms = RMS(storage=SqliteStorage(self.path))
+        print("Test Details: reopened flights -> [2, 3]")
+
+    # Test: get / scan / date range use the indexed columns
+    def test_indexed_reads(self):
+        self._seed()
+        st = self.storage
+        self.assertEqual(st.get("clients", 1)["Name"], "Bob")
+        self.assertIsNone(st.get("clients", 99))
+        self.assertEqual([f["ID"] for f in st.scan("flights", client_id=1)], [1, 2])
+        dates = st.flights_between("2025-01-01 00:00", "2025-12-31 00:00")
+        self.assertEqual([f["ID"] for f in dates], [2, 1])
+        with self.assertRaises(ValueError):
+            list(st.scan("flights", StartCity="Hong Kong"))
+        print(f"Test Details: flights by date -> {[f['ID'] for f in dates]}")
+
+    # Test: update_meta merges nested dicts like JsonlStorage
+    def test_update_meta_merges(self):
+        st = self.storage
+        st.update_meta({"next_id": {"clients": 5}, "schema": {"clients": 2}})
+        st.update_meta({"next_id": {"flights": 9}})
+        meta = st.read_meta()
+        self.assertEqual(meta["next_id"], {"clients": 5, "flights": 9})
+        self.assertEqual(meta["schema"], {"clients": 2})
+        print(f"Test Details: merged next_id -> {meta['next_id']}")
+
+
+# 25. Test Class: Offset index + mmap single-row reads
+class TestJsonlOffsetIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.st = JsonlStorage(root=self.tmp.name, journal=True)
+        self.st.write_clients(
+            [{"client_id": i, "Name": f"Zoë {i}"} for i in (5, 3, 9, 1)]
+        )
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.st.close()
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: the sidecar is written with the snapshot; get decodes one row
+    def test_get_reads_through_index(self):
+        self.assertTrue(os.path.exists(self.st.clients_path + ".idx"))
+        self.st.iter_table = None  # no whole-table scan allowed
+        self.assertEqual(self.st.get("clients", 9)["Name"], "Zoë 9")
+        self.assertEqual(self.st.get("clients", "3")["Name"], "Zoë 3")
+        self.assertIsNone(self.st.get("clients", 4))
+        print("Test Details: get(9) / get('3') via offset index")
+
+    # Test: journal changes win over the indexed snapshot
+    def test_get_applies_journal(self):
+        self.st.put("clients", {"client_id": 3, "Name": "Changed"})
+        self.st.delete("clients", 5)
+        self.assertEqual(self.st.get("clients", 3)["Name"], "Changed")
+        self.assertIsNone(self.st.get("clients", 5))
+        self.assertEqual(self.st.get("clients", 1)["Name"], "Zoë 1")
+        print("Test Details: put 3 / delete 5 seen by get")
+
+    # Test: a missing or stale sidecar is rebuilt on the next get
+    def test_stale_index_is_rebuilt(self):
+        os.remove(self.st.clients_path + ".idx")
+        self.assertEqual(self.st.get("clients", 1)["Name"], "Zoë 1")
+        with open(self.st.clients_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"client_id": 7, "Name": "Late"}) + "\n")
+        self.st._stamp_schema("clients")
+        self.assertEqual(self.st.get("clients", 7)["Name"], "Late")
+        print("Test Details: row appended behind the index found after rebuild")
+
+
+# 26. Test Class: Columnar binary snapshots
+class TestJsonlColumnar(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.st = JsonlStorage(root=self.tmp.name, journal=True, columnar=True)
+        self.flights = [
+            {
+                "ID": i,
+                "Type": "flight",
+                "client_id": 1,
+                "airline_id": 2,
+                "Date": "2025-01-01 10:00",
+                "StartCity": "Hong Kong",
+                "EndCity": "Zürich" if i % 2 else "London",
+            }
+            for i in (1, 2, 3)
+        ]
+        self.st.write_flights(self.flights)
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.st.close()
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    # Test: a fresh .cols file is preferred and round-trips the rows
+    def test_load_prefers_fresh_columnar(self):
+        self.assertTrue(os.path.exists(self.st.columnar_paths["flights"]))
+        self.st._read_jsonl_bulk = None  # JSONL parse must not run
+        rows = self.st._table_rows("flights", bulk=True)
+        self.assertEqual(rows, self.flights)
+        print(f"Test Details: columnar load -> {[f['ID'] for f in rows]}")
+
+    # Test: load_table (the app's background loader) reads the .cols file
+    def test_load_table_uses_columnar(self):
+        st = JsonlStorage(root=self.tmp.name, journal=True, columnar=True)
+        st._read_jsonl_bulk = None  # JSONL parse must not run
+        rows = st.load_table("flights")
+        st.close()
+        self.assertEqual(rows, self.flights)
+        print(f"Test Details: load_table -> {[f['ID'] for f in rows]}")
+
+    # Test: a stale or corrupt .cols file falls back to JSONL and is rebuilt
+    def test_stale_or_corrupt_columnar_falls_back(self):
+        with open(self.st.flights_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**self.flights[0], "ID": 4}) + "\n")
+        self.st._stamp_schema("flights")
+        ids = [f["ID"] for f in self.st.load_all()["flights"]]
+        self.assertEqual(ids, [1, 2, 3, 4])
+        with open(self.st.columnar_paths["flights"], "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\xff")
+        rows = self.st.load_all()["flights"]
+        self.assertEqual([f["ID"] for f in rows], [1, 2, 3, 4])
+        self.assertIsNotNone(self.st._read_columnar("flights"))
+        print(f"Test Details: fallback load -> {[f['ID'] for f in rows]}")
+
+    # Test: rows with missing fields keep them missing; mixed types stay JSONL
+    def test_sparse_and_mixed_columns(self):
+        rows = [{"client_id": 1, "Name": "A"}, {"client_id": 2}]
+        self.st.write_clients(rows)
+        self.assertEqual(self.st._read_columnar("clients"), rows)
+        self.st.write_clients([{"client_id": 1, "Zip": 123}, {"client_id": 2}])
+        self.assertFalse(os.path.exists(self.st.columnar_paths["clients"]))
+        print("Test Details: sparse column round-trips, mixed column skipped")
+
+
+# 27. Test Class: Durability modes and group commit
+class TestJsonlDurability(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _storage(self, mode, **kw):
+        st = JsonlStorage(root=self.tmp.name, journal=True, durability=mode, **kw)
+        self.synced = []
+        fsync, fsync_fd = st._fsync, st._fsync_fd
+        st._fsync = lambda f: (self.synced.append(f.name), fsync(f))
+        st._fsync_fd = lambda fd: (self.synced.append("fd"), fsync_fd(fd))
+        return st
+
+    @staticmethod
+    def _put(i):
+        row = {"airline_id": i, "CompanyName": f"Air {i}"}
+        return [{"op": "put", "table": "airlines", "key": i, "row": row}]
+
+    # Test: unknown modes are rejected
+    def test_bad_mode(self):
+        with self.assertRaises(ValueError):
+            JsonlStorage(root=self.tmp.name, durability="sometimes")
+        print("Test Details: durability='sometimes' -> ValueError")
+
+    # Test: always fsyncs each append before returning
+    def test_always_syncs_every_append(self):
+        st = self._storage("always")
+        futures = [st.append_journal(self._put(i)) for i in range(1, 4)]
+        self.assertTrue(all(f.done() for f in futures))
+        self.assertEqual(len(self.synced), 3)
+        st.close()
+        print(f"Test Details: 3 appends -> {len(self.synced)} fsyncs")
+
+    # Test: concurrent appends in one window share a single fsync
+    def test_batch_group_commit(self):
+        st = self._storage("batch", commit_window_ms=200)
+        with ThreadPoolExecutor(8) as pool:
+            futures = list(pool.map(st.append_journal, map(self._put, range(1, 9))))
+        for f in futures:
+            f.result(5)
+        self.assertEqual(len(self.synced), 1)
+        ids = [a["airline_id"] for a in st.load_all()["airlines"]]
+        self.assertEqual(sorted(ids), list(range(1, 9)))
+        st.close()
+        print(f"Test Details: 8 concurrent appends -> {len(self.synced)} fsync")
+
+    # Test: sync also waits for a batch the committer is already fsyncing
+    def test_sync_waits_for_in_flight_batch(self):
+        st = self._storage("batch", commit_window_ms=0)
+        fsync_fd = st._fsync_fd
+        st._fsync_fd = lambda fd: (time.sleep(0.2), fsync_fd(fd))
+        fut = st.append_journal(self._put(1))
+        while st._commit_waiters:  # picked up, fsync in progress
+            time.sleep(0.01)
+        st.sync(5)
+        self.assertTrue(fut.done())
+        st.close()
+        print("Test Details: sync returned after the in-flight fsync")
+
+    # Test: a journal compacted before its commit is fsynced, not recreated
+    def test_batch_commit_after_compaction(self):
+        st = self._storage("batch", commit_window_ms=200)
+        fut = st.append_journal(self._put(1))
+        st.compact("airlines")
+        fut.result(5)
+        self.assertEqual(self.synced.count("fd"), 1)
+        self.assertFalse(os.path.exists(st.journal_paths["airlines"]))
+        self.assertEqual(st.get("airlines", 1)["CompanyName"], "Air 1")
+        st.close()
+        print("Test Details: renamed journal fsynced by descriptor")
+
+    # Test: RMS.sync waits for the commit of its last save; close drains
+    def test_rms_sync_and_close(self):
+        rms = RMS(storage=self._storage("batch"))
+        rms.create_airline({"CompanyName": "Cathay"})
+        rms.sync(5)
+        self.assertTrue(rms._commit.done())
+        rms.create_airline({"CompanyName": "Qantas"})
+        rms.close()
+        self.assertTrue(rms._commit.done())
+        print(f"Test Details: fsyncs after sync + close = {len(self.synced)}")
+
+
+# 28. Test Class: Transactions (one persist per batch, rollback on error)
+class TestRMSTransaction(unittest.TestCase):
+    def setUp(self):
+        self.storage = MockStorage()
+        self.rms = RMS(storage=self.storage)
+        self.rms.create_airline({"CompanyName": "Cathay"})
+        self.rms.create_client(self._client("Bob"))
+        for _ in range(3):
+            self.rms.create_flight(self._flight())
+        self.writes = []
+        for t in ("clients", "airlines", "flights"):
+            write = getattr(self.storage, f"write_{t}")
+            setattr(self.storage, f"write_{t}", self._counting(t, write))
+        print(f"\n=== Starting Test: {self._testMethodName} ===")
+
+    def tearDown(self):
+        print(f"=== Completed Test: {self._testMethodName} (PASSED) ===")
+
+    def _counting(self, table, write):
+        return lambda rows: (self.writes.append(table), write(rows))
+
+    @staticmethod
+    def _client(name):
+        return {
+            "Name": name,
+            "Address1": "Street A",
+            "City": "Hong Kong",
+            "State": "Hong Kong",
+            "Zip": "123",
+            "Country": "Hong Kong",
+            "Phone": "1234567",
+        }
+
+    @staticmethod
+    def _flight():
+        return {
+            "client_id": 1,
+            "airline_id": 1,
+            "Date": "2025-01-01 10:00",
+            "StartCity": "Hong Kong",
+            "EndCity": "London",
+        }
+
+    # Test: a batch writes each touched table once, at the end
+    def test_commit_writes_each_table_once(self):
+        with self.rms.transaction():
+            self.rms.create_client(self._client("Ann"))
+            for _ in range(5):
+                self.rms.create_flight(self._flight())
+            self.rms.update_flight(1, {"EndCity": "Paris"})
+            self.assertEqual(self.writes, [])
+        self.assertEqual(sorted(self.writes), ["clients", "flights"])
+        self.assertEqual(len(self.storage.flights), 8)
+        print(f"Test Details: writes at commit -> {sorted(self.writes)}")
+
+    # Test: an error undoes every change, drops events and writes nothing
+    def test_rollback_restores_state(self):
+        before = [list(self.rms.clients), list(self.rms.flights)]
+        events = []
+        self.rms.subscribe(events.append)
+        with self.assertRaises(ValueError):
+            with self.rms.batch():
+                self.rms.update_client(1, {"Name": "Robert"})
+                self.rms.delete_flight(2)
+                self.rms.create_flight(self._flight())
+                self.rms.create_client(self._client(""))  # fails validation
+        self.assertEqual([self.rms.clients, self.rms.flights], before)
+        self.assertEqual([f["ID"] for f in self.rms.flights], [1, 2, 3])
+        self.assertEqual(self.rms.get_client(1)["Name"], "Bob")
+        self.assertEqual([c["client_id"] for c in self.rms.search_clients("bob")], [1])
+        self.assertEqual((events, self.writes), ([], []))
+        self.assertEqual(self.rms.dirty_tables(), [])
+        print(f"Test Details: flights after rollback -> {[1, 2, 3]}")
+
+    # Test: rolled-back deletes come back at their old place in the view
+    def test_rollback_keeps_view_order(self):
+        with self.assertRaises(RuntimeError):
+            with self.rms.transaction():
+                self.rms.delete_flight(1)
+                self.rms.update_flight(2, {"EndCity": "Paris"})
+                self.rms.delete_flight(2)
+                raise RuntimeError("abort")
+        view = self.rms.list_flights_enriched()
+        self.assertEqual([f["ID"] for f in view], [1, 2, 3])
+        self.assertEqual(view[1]["EndCity"], "London")
+        self.assertEqual(self.rms.get_flight_enriched(1), view[0])
+        print(f"Test Details: view after rollback -> {[f['ID'] for f in view]}")
+
+    # Test: a commit that fails after writing some tables leaves them dirty
+    def test_failed_commit_rewrites_written_tables(self):
+        write = self.storage.write_flights
+
+        def failing(rows):
+            raise OSError("disk full")
+
+        self.storage.write_flights = failing
+        with self.assertRaises(OSError):
+            with self.rms.transaction():
+                self.rms.create_client(self._client("Ann"))
+                self.rms.create_flight(self._flight())
+        self.assertEqual(self.writes, ["clients"])  # written before the failure
+        self.assertEqual(self.rms.dirty_tables(), ["clients", "flights"])
+        self.storage.write_flights = write
+        self.rms.save_all()
+        self.assertEqual(self.writes, ["clients", "clients", "flights"])
+        self.assertEqual([c["client_id"] for c in self.storage.clients], [1])
+        self.assertEqual(len(self.storage.flights), 3)
+        print(f"Test Details: dirty after failed commit -> {['clients', 'flights']}")
+
+    # Test: a failed nested block rolls back only itself
+    def test_nested_savepoint(self):
+        with self.rms.transaction():
+            self.rms.delete_flight(3)
+            try:
+                with self.rms.transaction():
+                    self.rms.delete_flight(1)
+                    raise RuntimeError("abort inner")
+            except RuntimeError:
+                pass
+        ids = [f["ID"] for f in self.storage.flights]
+        self.assertEqual(ids, [1, 2])
+        self.assertEqual(self.writes, ["flights"])
+        print(f"Test Details: persisted flights -> {ids}")
+
+    # Test: row-level storage gets one apply() for the whole batch
+    def test_row_level_single_apply(self):
+        with tempfile.TemporaryDirectory() as root:
+            st = JsonlStorage(root=root, journal=True)
+            rms = RMS(storage=st)
+            calls = []
+            apply = st.apply
+            st.apply = lambda entries: (calls.append(len(entries)), apply(entries))[1]
+            with rms.transaction():
+                rms.create_airline({"CompanyName": "Cathay"})
+                rms.create_airline({"CompanyName": "Qantas"})
+            rms.close()
+            self.assertEqual(calls, [2])
+            self.assertEqual(len(st.load_all()["airlines"]), 2)
+        print(f"Test Details: apply() calls -> {calls}")
+
+
 # Entry point for the Unit test functon
 if __name__ == "__main__":
     print("=== STARTING ALL RMS UNIT TESTS ===")